@@ -1,63 +1,208 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import Session, selectinload
 from datetime import datetime, timedelta, timezone
+from functools import wraps
 from config import Config
+from search import search_opportunities
+from dbpool import engine_options, pool_status
+from routing import REPLICA_BIND, RoutingSession
+from instrumentation import init_instrumentation, timed_serialization
+from metrics import init_metrics, record_cache, track_upload
+from serializers import (SUMMARY_DESCRIPTION_LENGTH, OrjsonProvider, dumps, extend_summary, join_summaries,
+                         store_summaries, summary_payload, truncate)
+from cache import CatalogueCache, LRUCache, create_cache
+from imaging import parse_sizes, process_image
+from media import FakeUploader, UploadQueue, read_pending_files, upload_batch
+from storage import content_type, create_storage
+from media_gc import collect_orphans, release_files
+import migrations
 from flask_cors import CORS
+from flask_jwt_extended import decode_token, get_jwt, jwt_required, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from werkzeug.local import LocalProxy
+from auth import USER_CLAIMS, create_blocklist, create_tokens, init_jwt, user_claims
+import base64
+import click
+import hashlib
 import os
-import sys
 
-# Créer l'application Flask d'abord
-app = Flask(__name__)
-app.config.from_object(Config)
-app.secret_key = app.config['SECRET_KEY']  # Important pour les sessions
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
-CORS(app, supports_credentials=True, origins=["http://localhost:8081", "http://localhost:19000", "exp://*", "http://localhost:5000"])
+# Même format que CURRENT_TIMESTAMP sous SQLite, pour que les comparaisons
+# de dates (pagination par curseur) restent exactes
+Timestamp = db.DateTime().with_variant(
+    sqlite.DATETIME(storage_format='%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d'),
+    'sqlite'
+)
 
-
-
-# Configuration de la base de données avec validation
-database_url = os.environ.get('DATABASE_URL', '')
-
-if database_url:
+def normalize_database_url(database_url):
     # Correction pour PostgreSQL sur Railway
     if database_url.startswith('postgres://'):
         database_url = database_url.replace('postgres://', 'postgresql://', 1)
-    
-    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
-else:
-    # Fallback vers SQLite si DATABASE_URL n'est pas définie
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///app.db'
-
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-db = SQLAlchemy(app)
-
-# Importer Cloudinary APRÈS avoir configuré l'application
-try:
-    import cloudinary
-    import cloudinary.uploader
-    import cloudinary.api
-    
-    # Configuration Cloudinary (uniquement si les variables existent)
-    if all([
-        app.config.get('CLOUDINARY_CLOUD_NAME'),
-        app.config.get('CLOUDINARY_API_KEY'), 
-        app.config.get('CLOUDINARY_API_SECRET')
-    ]):
+    return database_url
+
+def database_uri():
+    """URL de la base : DATABASE_URL (PostgreSQL sur Railway) ou SQLite en local"""
+    database_url = os.environ.get('DATABASE_URL', '')
+    if not database_url:
+        # Fallback vers SQLite si DATABASE_URL n'est pas définie
+        return 'sqlite:///app.db'
+    return normalize_database_url(database_url)
+
+def create_app(config_object=Config):
+    """Créer et configurer l'application.
+
+    Aucun accès à la base ni appel réseau ici : le schéma et les données
+    initiales sont créés par `flask init-db` (phase de release), et
+    Cloudinary n'est configuré qu'au premier upload.
+    """
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)  # jsonify via orjson s'il est installé
+    app.config.from_object(config_object)
+    app.secret_key = app.config['SECRET_KEY']  # Important pour les sessions
+    app.logger.setLevel(app.config['LOG_LEVEL'])
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri()
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config, app.config['SQLALCHEMY_DATABASE_URI'])
+    if app.config.get('DATABASE_REPLICA_URL'):
+        # Réplica en lecture seule, utilisé par les vues marquées read_replica
+        replica_url = normalize_database_url(app.config['DATABASE_REPLICA_URL'])
+        app.config['SQLALCHEMY_BINDS'] = {
+            REPLICA_BIND: {'url': replica_url, **engine_options(app.config, replica_url)}
+        }
+    
+    init_instrumentation(app)
+    init_metrics(app)
+    CORS(app, supports_credentials=True, origins=["http://localhost:8081", "http://localhost:19000", "exp://*", "http://localhost:5000"])
+    db.init_app(app)
+    return app
+
+app = create_app()
+
+# Cache des réponses du catalogue, invalidé par les écritures admin
+catalogue_cache = CatalogueCache(create_cache(app.config))
+
+# Jetons JWT de l'API mobile et jetons révoqués
+token_blocklist = create_blocklist(app.config)
+init_jwt(app, token_blocklist)
+
+# Registre des catégories, gardé en mémoire (les autres workers le relisent après expiration)
+category_cache = LRUCache(max_entries=1, default_ttl=app.config['CATEGORY_CACHE_TTL'])
+
+# Résumés des utilisateurs connectés, par id (voir get_current_user)
+user_cache = LRUCache(max_entries=app.config['USER_CACHE_MAX_ENTRIES'], default_ttl=app.config['USER_CACHE_TTL'])
+
+_cloudinary = None
+
+def get_cloudinary():
+    """Importer et configurer Cloudinary au premier usage plutôt qu'au démarrage de chaque worker"""
+    global _cloudinary
+    if _cloudinary is None:
+        try:
+            import cloudinary
+            import cloudinary.uploader
+            import cloudinary.api
+        except ImportError:
+            raise RuntimeError("Module Cloudinary non installé, l'upload d'images est désactivé")
+        
+        # Configuration Cloudinary (uniquement si les variables existent)
+        if not all([
+            app.config.get('CLOUDINARY_CLOUD_NAME'),
+            app.config.get('CLOUDINARY_API_KEY'),
+            app.config.get('CLOUDINARY_API_SECRET')
+        ]):
+            raise RuntimeError("Variables Cloudinary manquantes, l'upload d'images est désactivé")
+        
         cloudinary.config(
             cloud_name = app.config['CLOUDINARY_CLOUD_NAME'],
             api_key = app.config['CLOUDINARY_API_KEY'],
             api_secret = app.config['CLOUDINARY_API_SECRET'],
             secure = True
         )
-        print("✅ Cloudinary configuré avec succès", file=sys.stderr)
-    else:
-        print("⚠️ Variables Cloudinary manquantes. L'upload d'images sera désactivé.", file=sys.stderr)
-        
-except ImportError:
-    print("⚠️ Module Cloudinary non installé. L'upload d'images sera désactivé.", file=sys.stderr)
-    # Définir des fonctions de secours
-    cloudinary = None
+        _cloudinary = cloudinary
+    return _cloudinary
+
+
+# Uploads des images hors du thread de la requête
+upload_queue = UploadQueue(app.config['MEDIA_UPLOAD_WORKERS'])
+
+_fake_uploader = None
+
+def get_uploader():
+    """Uploader configuré : cloudinary.uploader, ou FakeUploader (MEDIA_UPLOADER=fake)"""
+    global _fake_uploader
+    if app.config['MEDIA_UPLOADER'] == 'fake':
+        if _fake_uploader is None:
+            _fake_uploader = FakeUploader()
+        return _fake_uploader
+    return get_cloudinary().uploader
+
+def get_media_api():
+    """API d'administration Cloudinary (listage et suppression par lots)"""
+    if app.config['MEDIA_UPLOADER'] == 'fake':
+        return get_uploader()
+    return get_cloudinary().api
+
+# Stockage des médias : Cloudinary, disque local ou mémoire (MEDIA_STORAGE)
+media_storage = create_storage(app.config, get_uploader, get_media_api,
+                               os.path.join(app.instance_path, 'media'))
+
+MEDIA_FOLDER = "zonebourse/opportunities"
+
+def store_media(data, **options):
+    """Enregistrer un fichier dans le stockage des médias (mesuré pour /metrics)"""
+    with track_upload(app.config['MEDIA_STORAGE']):
+        return media_storage.save(data, **options)
+
+def upload_image_data(data, filename):
+    """Préparer une image (réduction, réencodage, miniatures) puis la stocker.
+
+    Retourne url, public_id, dimensions et miniatures stockées.
+    """
+    processed = process_image(
+        data,
+        max_width=app.config['MEDIA_MAX_WIDTH'],
+        max_height=app.config['MEDIA_MAX_HEIGHT'],
+        sizes=parse_sizes(app.config['MEDIA_THUMBNAIL_SIZES']),
+        fmt=app.config['MEDIA_IMAGE_FORMAT'],
+        quality=app.config['MEDIA_IMAGE_QUALITY']
+    )
+    if processed is None:
+        # Sans Pillow : original stocké, redimensionné par Cloudinary (ignoré par les autres stockages)
+        stored = store_media(
+            data,
+            folder=MEDIA_FOLDER,
+            filename=filename,
+            transformation=[
+                {'width': app.config['MEDIA_MAX_WIDTH'], 'height': app.config['MEDIA_MAX_HEIGHT'], 'crop': 'limit'},
+                {'quality': 'auto:good'}
+            ]
+        )
+        return {**stored, 'width': None, 'height': None, 'variants': []}
+    
+    main, variants = processed
+    stem = os.path.splitext(filename or 'image')[0]
+    stored = store_media(main.data, folder=MEDIA_FOLDER,
+                         filename=f"{stem}.{main.extension}")
+    result = {**stored, 'width': main.width, 'height': main.height, 'variants': []}
+    for name, variant in variants.items():
+        stored_variant = store_media(variant.data, folder=f"{MEDIA_FOLDER}/thumbnails",
+                                     filename=f"{stem}-{name}.{variant.extension}")
+        result['variants'].append({'name': name, 'url': stored_variant['url'],
+                                   'public_id': stored_variant['public_id'],
+                                   'width': variant.width, 'height': variant.height})
+    return result
+
+def upload_images(files):
+    """Envoyer plusieurs images en parallèle, un résultat par fichier"""
+    return upload_batch(upload_image_data, files,
+                        max_concurrency=app.config['MEDIA_UPLOAD_CONCURRENCY'],
+                        retries=app.config['MEDIA_UPLOAD_RETRIES'],
+                        backoff=app.config['MEDIA_UPLOAD_BACKOFF'])
 
 
 # Modèle utilisateur
@@ -73,6 +218,11 @@ class User(db.Model):
     subscription_days = db.Column(db.Integer, default=0)  # Nouveau champ
     subscription_expiry = db.Column(db.DateTime)  # Nouveau champ
     created_at = db.Column(db.DateTime, server_default=db.func.now())
+    
+    # Index créés sur les bases existantes par la migration 0002
+    __table_args__ = (
+        db.Index('ix_user_is_active', 'is_active'),
+    )
 
 # Modèle pour les opportunités
 class Opportunity(db.Model):
@@ -86,79 +236,268 @@ class Opportunity(db.Model):
     is_featured = db.Column(db.Boolean, default=False)
     
     # Champs de postulation
-    postulation_steps = db.Column(db.Text)  # Étapes séparées par |||
-    documents_required = db.Column(db.Text)  # Documents séparés par |||
+    # postulation_steps, documents_required, image_urls et image_public_ids sont les
+    # anciennes colonnes '|||' : remplacées par les tables filles (migration 0003),
+    # conservées uniquement pour pouvoir revenir en arrière
+    postulation_steps = db.Column(db.Text)
+    documents_required = db.Column(db.Text)
     postulation_link = db.Column(db.String(500))
     contact_email = db.Column(db.String(120))
     contact_phone = db.Column(db.String(50))
     
     # Images - stocker les URLs Cloudinary
-    image_urls = db.Column(db.Text)  # URLs séparées par |||
-    image_public_ids = db.Column(db.Text)  # IDs publics Cloudinary séparés par |||
+    image_urls = db.Column(db.Text)
+    image_public_ids = db.Column(db.Text)
     
     # Vidéo
     video_url = db.Column(db.String(500))
     
-    created_at = db.Column(db.DateTime, server_default=db.func.now())
-# ===== AJOUTEZ CE BLOC =====
-# Initialisation automatique de la base de données
-print("🚀 Initialisation de la base de données...", file=sys.stderr)
-try:
-    with app.app_context():
-        # Créer toutes les tables
-        db.create_all()
-        print("✅ Tables SQLAlchemy créées", file=sys.stderr)
-        
-        # Vérifier/créer l'utilisateur admin
-        admin = User.query.filter_by(email=app.config['ADMIN_EMAIL']).first()
-        if not admin:
-            admin = User(
-                nom='Admin',
-                prenom='System',
-                numero='+7 9879040719',
-                email=app.config['ADMIN_EMAIL'],
-                password=app.config['ADMIN_PASSWORD'],
-                is_admin=True,
-                is_active=True,
-                subscription_days=9999  # Admin a accès illimité
-            )
-            db.session.add(admin)
-            db.session.commit()
-            print(f"✅ Compte admin créé: {app.config['ADMIN_EMAIL']}", file=sys.stderr)
-        else:
-            print(f"✅ Compte admin existant: {admin.email}", file=sys.stderr)
-        
-        # Créer des opportunités d'exemple si vide
-        if Opportunity.query.count() == 0:
-            opportunities = [
-                Opportunity(
-                    title='Bourse Complète',
-                    type='bourse',
-                    description='Bourse d\'études complète pour programmes universitaires',
-                    pays='France, Allemagne, Canada',
-                    montant='1,18€ / mois',
-                    is_featured=False
-                ),
-                # ... (ajoutez toutes vos opportunités ici)
-            ]
-            for opp in opportunities:
-                db.session.add(opp)
-            db.session.commit()
-            print(f"✅ {len(opportunities)} opportunités créées", file=sys.stderr)
-        else:
-            print(f"✅ {Opportunity.query.count()} opportunités existantes", file=sys.stderr)
-            
-except Exception as e:
-    print(f"❌ ERREUR lors de l'initialisation: {str(e)}", file=sys.stderr)
-    # Ne pas lever l'exception pour éviter de bloquer le démarrage
+    created_at = db.Column(Timestamp, server_default=db.func.now())
+    # Renseignés à chaque écriture par record_catalogue_changes (synchronisation mobile)
+    updated_at = db.Column(Timestamp)
+    revision = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Représentation liste sérialisée, recalculée à chaque écriture (migration 0009)
+    summary_json = db.deferred(db.Column(db.Text))
+    # pending : images en cours d'envoi, failed : au moins un envoi a échoué (migration 0007)
+    media_status = db.Column(db.String(20), nullable=False, default='ready', server_default='ready')
+    
+    # Index créés sur les bases existantes par les migrations 0002 et 0005
+    __table_args__ = (
+        db.Index('ix_opportunity_revision', 'revision'),
+        db.Index('ix_opportunity_created_at', created_at.desc(), id.desc()),
+        db.Index('ix_opportunity_type_created_at', 'type', created_at.desc(), id.desc()),
+        db.Index('ix_opportunity_featured_created_at', 'is_featured', created_at.desc()),
+        db.Index('ix_opportunity_deadline', 'deadline'),
+    )
+    
+    # Listes ordonnées (tables filles)
+    steps = db.relationship('OpportunityStep', order_by='OpportunityStep.position',
+                            cascade='all, delete-orphan')
+    documents = db.relationship('OpportunityDocument', order_by='OpportunityDocument.position',
+                                cascade='all, delete-orphan')
+    images = db.relationship('OpportunityImage', order_by='OpportunityImage.position',
+                             cascade='all, delete-orphan')
+    # Première image seulement, pour les listes
+    cover_image = db.relationship('OpportunityImage', uselist=False, viewonly=True,
+                                  primaryjoin='and_(OpportunityImage.opportunity_id == Opportunity.id, '
+                                              'OpportunityImage.position == 0)')
+
+# Tables filles de Opportunity (créées sur les bases existantes par la migration 0003)
+class OpportunityStep(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    opportunity_id = db.Column(db.Integer, db.ForeignKey('opportunity.id', ondelete='CASCADE'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_opportunity_step_opportunity_position', 'opportunity_id', 'position'),
+    )
 
-print("✅ Initialisation de la base terminée", file=sys.stderr)
+class OpportunityDocument(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    opportunity_id = db.Column(db.Integer, db.ForeignKey('opportunity.id', ondelete='CASCADE'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_opportunity_document_opportunity_position', 'opportunity_id', 'position'),
+    )
 
+class OpportunityImage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    opportunity_id = db.Column(db.Integer, db.ForeignKey('opportunity.id', ondelete='CASCADE'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    url = db.Column(db.String(500), nullable=False)
+    public_id = db.Column(db.String(255))  # ID public Cloudinary
+    # Dimensions de l'image préparée localement (migration 0008)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    
+    # Miniatures (small, medium, ...)
+    variants = db.relationship('OpportunityImageVariant', order_by='OpportunityImageVariant.width',
+                               cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        db.Index('ix_opportunity_image_opportunity_position', 'opportunity_id', 'position'),
+    )
 
-# Initialisation de la base
+# Miniatures d'une image, générées avant l'envoi
+class OpportunityImageVariant(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    image_id = db.Column(db.Integer, db.ForeignKey('opportunity_image.id', ondelete='CASCADE'),
+                         nullable=False, index=True)
+    name = db.Column(db.String(20), nullable=False)
+    url = db.Column(db.String(500), nullable=False)
+    public_id = db.Column(db.String(255))
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+# Révision du catalogue : une seule ligne, incrémentée dans la transaction de
+# chaque écriture sur les opportunités (ETag / Last-Modified des API)
+class CatalogueState(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(Timestamp, server_default=db.func.now())
+
+# Catégories affichées par l'API (id = valeur de Opportunity.type), migration 0006
+class Category(db.Model):
+    id = db.Column(db.String(50), primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    icon = db.Column(db.String(50))
+    description = db.Column(db.String(200))
+    position = db.Column(db.Integer, nullable=False, default=0)
+
+# Suppressions conservées pour la synchronisation incrémentale (migration 0005)
+class OpportunityTombstone(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    opportunity_id = db.Column(db.Integer, nullable=False)
+    revision = db.Column(db.Integer, nullable=False, index=True)
+    deleted_at = db.Column(Timestamp, server_default=db.func.now())
+
+CHILD_MODELS = (OpportunityStep, OpportunityDocument, OpportunityImage)
+
+@event.listens_for(Session, 'after_flush')
+def record_catalogue_changes(session, flush_context):
+    """Incrémenter la révision du catalogue et l'inscrire sur les lignes modifiées"""
+    changed, deleted = set(), set()
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Opportunity):
+            changed.add(obj.id)
+        elif isinstance(obj, CHILD_MODELS):
+            changed.add(obj.opportunity_id)
+    for obj in session.deleted:
+        if isinstance(obj, Opportunity):
+            deleted.add(obj.id)
+        elif isinstance(obj, CHILD_MODELS):
+            changed.add(obj.opportunity_id)
+    changed -= deleted
+    categories_changed = any(isinstance(obj, Category)
+                             for obj in list(session.new) + list(session.dirty) + list(session.deleted))
+    if categories_changed:
+        category_cache.clear()
+    if not changed and not deleted and not categories_changed:
+        return
+    
+    connection = session.connection()
+    if changed:
+        store_summaries(connection, changed)
+    
+    # Le verrou sur la ligne catalogue_state ordonne les écritures concurrentes
+    connection.execute(CatalogueState.__table__.update().values(
+        version=CatalogueState.version + 1,
+        updated_at=db.func.now()
+    ))
+    revision = connection.execute(db.select(CatalogueState.version).where(CatalogueState.id == 1)).scalar()
+    if revision is None:
+        return
+    
+    if changed:
+        connection.execute(Opportunity.__table__.update()
+                           .where(Opportunity.id.in_(changed))
+                           .values(revision=revision, updated_at=db.func.now()))
+    if deleted:
+        connection.execute(OpportunityTombstone.__table__.insert(),
+                           [{'opportunity_id': opportunity_id, 'revision': revision} for opportunity_id in deleted])
+
+# Lecture de ses propres écritures : après une écriture, le client reste sur la
+# base principale le temps que le réplica rattrape son retard
+@event.listens_for(Session, 'after_flush')
+def remember_write(session, flush_context):
+    if has_request_context():
+        g.db_wrote = True
+        # Relues après l'écriture
+        g.pop('catalogue_revision', None)
+        g.pop('users_fingerprint', None)
+
+@app.after_request
+def stick_to_primary(response):
+    if g.get('db_wrote') and app.config.get('DATABASE_REPLICA_URL'):
+        session['primary_until'] = int(datetime.now(timezone.utc).timestamp()) + app.config['REPLICA_STICKY_SECONDS']
+    return response
+
+# Utilisateurs modifiés ou supprimés : après le commit, leur résumé en cache est
+# oublié et leurs jetons d'accès sont révoqués (le client obtient un jeton à jour,
+# ou un refus, via /api/token/refresh)
+@event.listens_for(Session, 'after_flush')
+def remember_user_changes(session, flush_context):
+    changed = {obj.id for obj in list(session.dirty) + list(session.deleted) if isinstance(obj, User)}
+    if changed:
+        session.info.setdefault('users_changed', set()).update(changed)
+
+@event.listens_for(Session, 'after_commit')
+def forget_changed_users(session):
+    for user_id in session.info.pop('users_changed', ()):
+        user_cache.delete(user_id)
+        token_blocklist.revoke_user(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def forget_user_changes(session):
+    session.info.pop('users_changed', None)
+
+def api_claims(strict=True):
+    """Identité portée par le jeton d'accès (Authorization: Bearer), None sans jeton.
+
+    strict=False : un jeton expiré, révoqué ou invalide compte comme absent au
+    lieu de produire une erreur 401 (déconnexion, vérification de session).
+    """
+    try:
+        if verify_jwt_in_request(optional=True) is None:
+            return None
+    except (PyJWTError, JWTExtendedException):
+        if strict:
+            raise
+        return None
+    return get_jwt()
+
+def user_summary(user):
+    """Résumé d'un utilisateur : les informations du jeton d'accès, plus l'id"""
+    return {'id': user.id, **user_claims(user)}
+
+def load_current_user():
+    claims = api_claims()
+    if claims:
+        # Jeton d'accès : le résumé est dans le jeton
+        return {'id': int(claims['sub']), **{key: claims[key] for key in USER_CLAIMS}}
+    
+    user_id = session.get('user_id')
+    if user_id is None:
+        return None
+    summary = user_cache.get(user_id)
+    record_cache('users', summary is not None)
+    if summary is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        summary = user_summary(user)
+        if app.config['USER_CACHE_TTL']:
+            user_cache.set(user_id, summary)
+    return summary
+
+def get_current_user():
+    """Utilisateur connecté (résumé, None si anonyme), chargé au plus une fois par requête"""
+    if 'current_user' not in g:
+        g.current_user = load_current_user()
+    return g.current_user
+
+@app.context_processor
+def inject_current_user():
+    return {'current_user': LocalProxy(get_current_user)}
+
+def read_replica(view):
+    """Décorateur : exécuter les lectures de la vue sur le réplica, sauf juste après une écriture du client"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.use_replica = bool(app.config.get('DATABASE_REPLICA_URL')) and \
+            session.get('primary_until', 0) < datetime.now(timezone.utc).timestamp()
+        return view(*args, **kwargs)
+    return wrapper
+
+# Initialisation de la base (phase de release, jamais à l'import)
 def init_db():
+    """Créer le schéma, appliquer les migrations et les données initiales"""
     with app.app_context():
         db.create_all()
+        for migration in migrations.upgrade(db.engine):
+            print(f"✅ Migration {migration.version} appliquée : {migration.description}")
         
         # Créer admin
         admin = User.query.filter_by(email=app.config['ADMIN_EMAIL']).first()
@@ -170,7 +509,8 @@ def init_db():
                 email=app.config['ADMIN_EMAIL'],
                 password=app.config['ADMIN_PASSWORD'],  # En clair
                 is_admin=True,
-                is_active=True
+                is_active=True,
+                subscription_days=9999  # Admin a accès illimité
             )
             db.session.add(admin)
             db.session.commit()
@@ -233,6 +573,359 @@ def init_db():
             db.session.commit()
             print(f"✅ {len(opportunities)} opportunités créées")
 
+@app.cli.command('init-db')
+def init_db_command():
+    """Créer le schéma et les données initiales (à lancer une fois par déploiement)"""
+    init_db()
+    click.echo("Initialisation terminée")
+
+# Commandes de migration (flask --app app db-upgrade / db-downgrade / db-status)
+@app.cli.command('db-upgrade')
+@click.argument('target', required=False)
+def db_upgrade_command(target):
+    """Appliquer les migrations en attente"""
+    db.create_all()
+    for migration in migrations.upgrade(db.engine, target):
+        click.echo(f"✅ {migration.version} appliquée : {migration.description}")
+    click.echo("Base à jour")
+
+@app.cli.command('db-downgrade')
+@click.argument('target')
+def db_downgrade_command(target):
+    """Annuler les migrations postérieures à TARGET (0000 pour tout annuler)"""
+    for migration in migrations.downgrade(db.engine, target):
+        click.echo(f"↩️  {migration.version} annulée : {migration.description}")
+
+@app.cli.command('db-status')
+def db_status_command():
+    """Afficher les migrations en attente et les index manquants"""
+    pending = migrations.pending_migrations(db.engine)
+    for migration in pending:
+        click.echo(f"⏳ {migration.version} en attente : {migration.description}")
+    
+    missing = migrations.missing_indexes(db.engine, db.metadata)
+    for table, index in missing:
+        click.echo(f"⚠️ Index manquant : {index} sur {table}")
+    
+    if not pending and not missing:
+        click.echo("✅ Schéma à jour")
+    elif missing:
+        raise SystemExit(1)
+
+@app.cli.command('media-gc')
+@click.option('--dry-run', is_flag=True, help="Lister les orphelins sans les supprimer")
+def media_gc_command(dry_run):
+    """Supprimer les médias qui ne sont plus référencés"""
+    report = run_media_gc(dry_run=dry_run)
+    click.echo(format_media_gc_report(report))
+
+def current_revision():
+    """Révision du catalogue vue par cette requête (lue une fois, ou par conditional_get)"""
+    if g.get('catalogue_revision') is None:
+        g.catalogue_revision = db.session.execute(db.select(CatalogueState.version)
+                                                  .where(CatalogueState.id == 1)).scalar()
+    return g.catalogue_revision
+
+def cached_json_response(key, build):
+    """Réponse JSON servie depuis le cache du catalogue, construite par build() si absente"""
+    # La clé porte la révision lue en base (celle de l'ETag) : une écriture faite
+    # par un autre worker ou processus change la clé même sans bump() local, et un
+    # réplica en retard ne remplit pas le cache de la version courante
+    key = f"{key}@{current_revision()}"
+    def build_body():
+        built.append(True)
+        value = build()
+        return value if isinstance(value, str) else app.json.dumps(value)
+    built = []
+    body = catalogue_cache.get_or_build(key, build_body)
+    record_cache('catalogue', not built)
+    return app.response_class(body, mimetype='application/json')
+
+# GET conditionnels (ETag / Last-Modified) sur les API du catalogue
+def users_fingerprint_columns():
+    """Nombre d'utilisateurs, d'utilisateurs actifs et plus grand id (statistiques)"""
+    return [db.select(db.func.count(User.id)).scalar_subquery(),
+            db.select(db.func.count(db.case((User.is_active == True, 1)))).scalar_subquery(),
+            db.select(db.func.max(User.id)).scalar_subquery()]
+
+def catalogue_fingerprint(include_users=False):
+    """(etag, last_modified) de la ressource demandée, en une seule requête"""
+    columns = [CatalogueState.version, CatalogueState.updated_at]
+    if include_users:
+        columns += users_fingerprint_columns()
+    state = db.session.execute(db.select(*columns).where(CatalogueState.id == 1)).first()
+    if state is None:
+        return None, None
+    g.catalogue_revision = state.version
+    if include_users:
+        g.users_fingerprint = tuple(state[2:])
+    
+    # Une page ou un filtre différent est une autre représentation
+    raw = ':'.join(str(value) for value in state[:1] + state[2:]) + ':' + request.full_path
+    etag = hashlib.sha1(raw.encode()).hexdigest()
+    last_modified = state.updated_at.replace(tzinfo=timezone.utc) if state.updated_at else None
+    return etag, last_modified
+
+def conditional_get(include_users=False):
+    """Décorateur : répondre 304 sans exécuter la vue si le client a déjà la version courante"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag, last_modified = catalogue_fingerprint(include_users)
+            if etag is None:
+                return view(*args, **kwargs)
+            
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            elif request.if_modified_since and last_modified and not include_users:
+                not_modified = last_modified.replace(microsecond=0) <= request.if_modified_since
+            else:
+                not_modified = False
+            
+            if not_modified:
+                response = app.response_class(status=304)
+            else:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag)
+            if not include_users:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+# Image de couverture et ses miniatures pour les listes
+SUMMARY_LOAD_OPTIONS = (
+    selectinload(Opportunity.cover_image).selectinload(OpportunityImage.variants),
+)
+
+def thumbnail_url(opp, name='small'):
+    """Miniature de la couverture, ou la couverture elle-même (images antérieures aux miniatures)"""
+    if opp.cover_image is None:
+        return None
+    for variant in opp.cover_image.variants:
+        if variant.name == name:
+            return variant.url
+    return opp.cover_image.url
+
+def serialize_opportunity_summary(opp):
+    """Représentation liste d'une opportunité (API mobile)"""
+    return summary_payload(opp, opp.cover_image.url if opp.cover_image else None, thumbnail_url(opp))
+
+# Colonnes lues par les listes : le résumé précalculé et la position du curseur
+SUMMARY_COLUMNS = db.load_only(Opportunity.id, Opportunity.created_at, Opportunity.summary_json)
+
+def summary_fragment(opp):
+    """Résumé JSON précalculé (calculé à la volée pour une ligne pas encore migrée)"""
+    return opp.summary_json or dumps(serialize_opportunity_summary(opp))
+
+@timed_serialization
+def summary_page_body(opportunities, next_cursor):
+    """Corps JSON d'une page de liste, par concaténation des résumés"""
+    return ('{"next_cursor":' + dumps(next_cursor) +
+            ',"opportunities":' + join_summaries(summary_fragment(opp) for opp in opportunities) + '}')
+
+def get_category_registry():
+    """Catégories (id, nom, icône, description) dans l'ordre d'affichage"""
+    # Clé par révision : une catégorie modifiée par un autre worker invalide aussi ce cache
+    key = f"registry@{current_revision()}"
+    registry = category_cache.get(key)
+    record_cache('categories', registry is not None)
+    if registry is None:
+        registry = [{
+            'id': category.id,
+            'name': category.name,
+            'icon': category.icon,
+            'description': category.description
+        } for category in Category.query.order_by(Category.position, Category.id).all()]
+        category_cache.set(key, registry)
+    return registry
+
+def count_by_type():
+    """Nombre d'opportunités par type, en une requête GROUP BY"""
+    rows = db.session.execute(
+        db.select(Opportunity.type, db.func.count(Opportunity.id)).group_by(Opportunity.type)
+    ).all()
+    return dict(rows)
+
+# Service de statistiques : un seul aller-retour SQL, mémorisé quelques secondes
+stats_cache = LRUCache(max_entries=1, default_ttl=app.config['STATS_CACHE_TTL'])
+
+def stats_key():
+    """Clé du mémo : l'empreinte déjà lue par conditional_get pour l'ETag de /api/stats
+    (révision et utilisateurs), donc sans requête de plus. Hors de ce chemin, pas de
+    mémo : la requête agrégée est le seul aller-retour"""
+    if g.get('catalogue_revision') is None or g.get('users_fingerprint') is None:
+        return None
+    return ':'.join(str(value) for value in (g.catalogue_revision, *g.users_fingerprint))
+
+def get_stats():
+    """Compteurs utilisateurs et opportunités agrégés en une requête"""
+    key = stats_key() if app.config['STATS_CACHE_TTL'] else None
+    stats = stats_cache.get(key) if key else None
+    if key:
+        record_cache('stats', stats is not None)
+    if stats is not None:
+        return stats
+    
+    users = db.select(
+        db.func.count(User.id).label('total_users'),
+        db.func.count(db.case((User.is_active == True, 1))).label('active_users')
+    ).subquery()
+    opportunities = db.select(
+        db.func.count(Opportunity.id).label('total_opportunities'),
+        db.func.count(db.case((Opportunity.is_featured == True, 1))).label('featured_opportunities'),
+        db.func.count(db.distinct(db.case((Opportunity.pays != '', Opportunity.pays)))).label('unique_pays')
+    ).subquery()
+    
+    # Deux sous-requêtes d'une ligne chacune, jointes sans condition
+    query = db.select(users, opportunities).select_from(users.join(opportunities, db.true()))
+    stats = dict(db.session.execute(query).mappings().one())
+    if key:
+        stats_cache.set(key, stats)
+    return stats
+
+# Chargement des tables filles en une requête par relation (pas de N+1)
+DETAIL_LOAD_OPTIONS = (
+    selectinload(Opportunity.steps),
+    selectinload(Opportunity.documents),
+    selectinload(Opportunity.images).selectinload(OpportunityImage.variants),
+)
+
+# Projection (?fields=) : seules les colonnes demandées sont lues en SQL
+CoverImage = db.aliased(OpportunityImage)
+CoverThumbnail = db.aliased(OpportunityImageVariant)
+
+PROJECTION_COLUMNS = {
+    'title': Opportunity.title,
+    'type': Opportunity.type,
+    # Un caractère de plus que la troncature pour savoir s'il faut ajouter '...'
+    'description': db.func.substr(Opportunity.description, 1, SUMMARY_DESCRIPTION_LENGTH + 1).label('description'),
+    'pays': Opportunity.pays,
+    'montant': Opportunity.montant,
+    'is_featured': Opportunity.is_featured,
+    'deadline': Opportunity.deadline,
+    'image_urls': CoverImage.url.label('image_urls'),
+    'thumbnail_url': db.func.coalesce(CoverThumbnail.url, CoverImage.url).label('thumbnail_url'),
+}
+PROJECTION_FIELDS = {'id', 'created_at', *PROJECTION_COLUMNS}
+
+def get_fields():
+    """Champs demandés (?fields=id,title,thumbnail_url), None pour la représentation complète"""
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+    fields = [field.strip() for field in raw.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in PROJECTION_FIELDS]
+    if unknown:
+        raise ValueError(f"Champs inconnus : {', '.join(unknown)}")
+    return list(dict.fromkeys(fields))
+
+def projection_query(fields):
+    """Requête des seules colonnes demandées (id et created_at servent au curseur)"""
+    columns = [Opportunity.id, Opportunity.created_at] + \
+              [PROJECTION_COLUMNS[field] for field in fields if field in PROJECTION_COLUMNS]
+    query = db.session.query(*columns)
+    if 'image_urls' in fields or 'thumbnail_url' in fields:
+        query = query.outerjoin(CoverImage, db.and_(CoverImage.opportunity_id == Opportunity.id,
+                                                    CoverImage.position == 0))
+    if 'thumbnail_url' in fields:
+        query = query.outerjoin(CoverThumbnail, db.and_(CoverThumbnail.image_id == CoverImage.id,
+                                                        CoverThumbnail.name == 'small'))
+    return query
+
+def serialize_projection(row, fields):
+    item = {}
+    for field in fields:
+        value = getattr(row, field)
+        if field == 'description' and value is not None:
+            value = truncate(value)
+        elif field in ('deadline', 'created_at') and value is not None:
+            value = value.isoformat()
+        elif field == 'is_featured':
+            value = bool(value)
+        item[field] = value
+    return item
+
+@timed_serialization
+def projection_page_body(rows, next_cursor, fields):
+    return dumps({'opportunities': [serialize_projection(row, fields) for row in rows],
+                  'next_cursor': next_cursor})
+
+@timed_serialization
+def changes_page_body(changed, deleted, current):
+    """Corps JSON d'un delta de synchronisation, par concaténation des résumés"""
+    changes = join_summaries(
+        extend_summary(summary_fragment(opp), updated_at=opp.updated_at.isoformat() if opp.updated_at else None)
+        for opp in changed if opp.id not in deleted
+    )
+    return ('{"changes":' + changes + ',"deleted":' + dumps(deleted) +
+            ',"reset":false,"sync_token":' + dumps(str(current)) + '}')
+
+def serialize_opportunity_detail(opportunity):
+    """Représentation complète d'une opportunité (API mobile)"""
+    return {
+        'id': opportunity.id,
+        'title': opportunity.title,
+        'type': opportunity.type,
+        'description': opportunity.description,
+        'pays': opportunity.pays,
+        'montant': opportunity.montant,
+        'deadline': opportunity.deadline.isoformat() if opportunity.deadline else None,
+        'is_featured': opportunity.is_featured,
+        'images': [image.url for image in opportunity.images],
+        'thumbnails': [{variant.name: variant.url for variant in image.variants}
+                       for image in opportunity.images],
+        'postulation_steps': [step.content for step in opportunity.steps],
+        'documents_required': [doc.content for doc in opportunity.documents],
+        'postulation_link': opportunity.postulation_link,
+        'contact_email': opportunity.contact_email,
+        'contact_phone': opportunity.contact_phone,
+        'video_url': opportunity.video_url,
+        'created_at': opportunity.created_at.isoformat()
+    }
+
+# Pagination par curseur (created_at, id)
+def encode_cursor(opportunity):
+    """Encoder la position d'une opportunité dans un curseur opaque"""
+    raw = f"{opportunity.created_at.isoformat()}|{opportunity.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Décoder un curseur - lève ValueError s'il est invalide"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, opportunity_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(opportunity_id)
+    except Exception:
+        raise ValueError('Curseur invalide')
+
+def get_page_size():
+    """Taille de page demandée (?limit=), bornée par la configuration"""
+    limit = request.args.get('limit', type=int) or app.config['OPPORTUNITIES_PAGE_SIZE']
+    return max(1, min(limit, app.config['OPPORTUNITIES_MAX_PAGE_SIZE']))
+
+def paginate_opportunities(query, cursor=None, limit=None):
+    """Retourner une page d'opportunités et le curseur de la page suivante.
+
+    La requête ne lit que limit + 1 lignes après la position du curseur,
+    le coût reste donc le même quelle que soit la taille du catalogue.
+    """
+    limit = limit or get_page_size()
+    if cursor:
+        created_at, opportunity_id = decode_cursor(cursor)
+        query = query.filter(db.or_(
+            Opportunity.created_at < created_at,
+            db.and_(Opportunity.created_at == created_at, Opportunity.id < opportunity_id)
+        ))
+    
+    items = query.order_by(Opportunity.created_at.desc(), Opportunity.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(items[limit - 1]) if len(items) > limit else None
+    return items[:limit], next_cursor
+
 # Routes principales
 @app.route('/')
 def splash():
@@ -352,42 +1045,53 @@ def upload_image():
         return jsonify({'success': False, 'error': 'Nom de fichier vide'}), 400
     
     try:
-        # Récupérer le timestamp depuis la requête
-        timestamp = request.form.get('timestamp')
-        
-        # Upload vers Cloudinary avec timestamp
-        upload_result = cloudinary.uploader.upload(
-            image_file,
-            folder="zonebourse/opportunities",
-            timestamp=timestamp if timestamp else None,
-            transformation=[
-                {'width': 1200, 'height': 800, 'crop': 'limit'},
-                {'quality': 'auto:good'}
-            ]
-        )
+        # Préparation locale puis upload (image principale et miniatures)
+        upload_result = upload_image_data(image_file.read(), image_file.filename)
         
         return jsonify({
             'success': True,
-            'url': upload_result['secure_url'],
-            'public_id': upload_result['public_id']
+            'url': upload_result['url'],
+            'public_id': upload_result['public_id'],
+            'variants': upload_result['variants']
         })
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         print(f"Erreur Cloudinary: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/admin/upload-images', methods=['POST'])
+def upload_images_batch():
+    """Envoyer plusieurs images en une requête, avec un résultat par fichier"""
+    if 'user_id' not in session or not session.get('is_admin'):
+        return jsonify({'success': False, 'error': 'Non autorisé'}), 403
+    
+    files = read_pending_files(request.files.getlist('images[]'))
+    if not files:
+        return jsonify({'success': False, 'error': 'Aucune image fournie'}), 400
+    
+    results = upload_images(files)
+    return jsonify({
+        'success': all(result['success'] for result in results),
+        'uploaded': sum(1 for result in results if result['success']),
+        'failed': sum(1 for result in results if not result['success']),
+        'results': results
+    })
+
 @app.route('/dashboard')
 def dashboard():
     if 'user_id' not in session:
         flash('Veuillez vous connecter pour accéder au tableau de bord.', 'error')
         return redirect(url_for('login'))
     
-    # Récupérer toutes les opportunités
-    opportunities = Opportunity.query.order_by(Opportunity.created_at.desc()).all()
+    # Première page seulement, la suite est chargée au défilement via l'API
+    opportunities, next_cursor = paginate_opportunities(Opportunity.query)
     
     return render_template('dashboard.html', 
                          user={'nom': session['user_nom'], 'prenom': session['user_prenom']},
-                         opportunities=opportunities)
+                         opportunities=opportunities,
+                         next_cursor=next_cursor)
 
 @app.route('/logout')
 def logout():
@@ -412,9 +1116,7 @@ def admin_dashboard():
         return redirect(url_for('login'))
     
     # Statistiques
-    total_users = User.query.count()
-    total_opportunities = Opportunity.query.count()
-    active_users = User.query.filter_by(is_active=True).count()
+    stats = get_stats()
     
     # Dernières opportunités
     recent_opportunities = Opportunity.query.order_by(Opportunity.created_at.desc()).limit(5).all()
@@ -422,9 +1124,9 @@ def admin_dashboard():
     return render_template('admin_dashboard.html',
                          user={'nom': session['user_nom'], 'prenom': session['user_prenom']},
                          stats={
-                             'total_users': total_users,
-                             'total_opportunities': total_opportunities,
-                             'active_users': active_users
+                             'total_users': stats['total_users'],
+                             'total_opportunities': stats['total_opportunities'],
+                             'active_users': stats['active_users']
                          },
                          recent_opportunities=recent_opportunities)
 
@@ -434,10 +1136,123 @@ def admin_opportunities():
         flash('Accès réservé aux administrateurs.', 'error')
         return redirect(url_for('login'))
     
-    opportunities = Opportunity.query.order_by(Opportunity.created_at.desc()).all()
+    try:
+        opportunities, next_cursor = paginate_opportunities(Opportunity.query, request.args.get('cursor'))
+    except ValueError:
+        return redirect(url_for('admin_opportunities'))
+    
+    # Compteurs globaux (la liste n'est plus qu'une page)
+    stats = get_stats()
+    counts = {
+        'total': stats['total_opportunities'],
+        'bourse': count_by_type().get('bourse', 0),
+        'featured': stats['featured_opportunities']
+    }
+    
     return render_template('admin_opportunities.html', 
                          user={'nom': session['user_nom'], 'prenom': session['user_prenom']},
-                         opportunities=opportunities)
+                         opportunities=opportunities,
+                         counts=counts,
+                         next_cursor=next_cursor)
+
+def process_pending_images(opportunity_id, files):
+    """Tâche d'arrière-plan : envoyer les images puis les rattacher à l'opportunité.
+
+    Une erreur inattendue est journalisée et l'opportunité passe en 'failed'
+    (sinon elle resterait 'pending', l'exception perdue dans le Future).
+    """
+    try:
+        attach_pending_images(opportunity_id, files)
+    except Exception:
+        app.logger.exception("Envoi des images de l'opportunité %s interrompu", opportunity_id)
+        mark_media_failed(opportunity_id)
+
+def attach_pending_images(opportunity_id, files):
+    results = upload_images(files)
+    uploaded = [result for result in results if result['success']]
+    failed = [result for result in results if not result['success']]
+    for result in failed:
+        app.logger.warning("Erreur d'upload Cloudinary (opportunité %s, %s) : %s",
+                           opportunity_id, result['filename'], result['error'])
+
+    with app.app_context():
+        opportunity = db.session.get(Opportunity, opportunity_id)
+        if opportunity is None:
+            return  # Supprimée entre-temps
+        start = len(opportunity.images)
+        for i, result in enumerate(uploaded):
+            opportunity.images.append(OpportunityImage(
+                position=start + i,
+                url=result['url'],
+                public_id=result['public_id'],
+                width=result['width'],
+                height=result['height'],
+                variants=[OpportunityImageVariant(**variant) for variant in result['variants']]
+            ))
+        opportunity.media_status = 'failed' if failed else 'ready'
+        db.session.commit()
+    catalogue_cache.bump()
+
+def mark_media_failed(opportunity_id):
+    """Passer une opportunité en 'failed' après l'échec de sa tâche d'images"""
+    try:
+        with app.app_context():
+            db.session.execute(db.update(Opportunity).where(Opportunity.id == opportunity_id)
+                               .values(media_status='failed'))
+            db.session.commit()
+    except Exception:
+        app.logger.exception("Impossible de marquer les images de l'opportunité %s en échec", opportunity_id)
+
+def referenced_public_ids(public_ids):
+    """public_id encore utilisés par une image ou une miniature"""
+    public_ids = list(public_ids)
+    images = db.session.query(OpportunityImage.public_id).filter(OpportunityImage.public_id.in_(public_ids))
+    variants = db.session.query(OpportunityImageVariant.public_id) \
+        .filter(OpportunityImageVariant.public_id.in_(public_ids))
+    return {public_id for (public_id,) in images.union(variants)}
+
+def format_media_gc_report(report):
+    reclaimed = 'récupérables' if report['dry_run'] else 'récupérés'
+    return (f"🧹 {report['scanned']} fichiers parcourus, {report['recent']} récents ignorés, "
+            f"{report['orphans']} orphelins, {report['deleted']} supprimés, "
+            f"{report['reclaimed_bytes']} octets {reclaimed}")
+
+def run_media_gc(dry_run=False):
+    """Supprimer les médias orphelins du stockage, retourne le rapport"""
+    with app.app_context():
+        return collect_orphans(
+            media_storage, referenced_public_ids, MEDIA_FOLDER,
+            min_age=timedelta(hours=app.config['MEDIA_GC_MIN_AGE_HOURS']),
+            batch_size=app.config['MEDIA_GC_BATCH_SIZE'],
+            pause=app.config['MEDIA_GC_PAUSE'],
+            dry_run=dry_run
+        )
+
+# Dernier passage du ramasse-miettes lancé depuis l'admin (par worker)
+last_media_gc = {}
+
+def media_gc_job(dry_run):
+    """Tâche d'arrière-plan : ramasse-miettes, rapport et erreurs dans le journal"""
+    started_at = datetime.utcnow()
+    last_media_gc.clear()
+    last_media_gc.update(status='running', dry_run=dry_run, started_at=started_at.isoformat())
+    try:
+        report = run_media_gc(dry_run)
+    except Exception as error:
+        app.logger.exception("Échec du ramasse-miettes des médias")
+        last_media_gc.update(status='failed', error=str(error), finished_at=datetime.utcnow().isoformat())
+        return
+    app.logger.info("Ramasse-miettes des médias : %s", format_media_gc_report(report))
+    last_media_gc.update(status='done', report=report, finished_at=datetime.utcnow().isoformat())
+
+def release_media(public_ids):
+    """Tâche d'arrière-plan : supprimer les fichiers d'une opportunité supprimée"""
+    with app.app_context():
+        try:
+            release_files(media_storage, referenced_public_ids, public_ids)
+        except Exception:
+            # Le ramasse-miettes les supprimera plus tard
+            app.logger.exception("Erreur de suppression des médias")
 
 @app.route('/admin/opportunities/add', methods=['GET', 'POST'])
 def admin_add_opportunity():
@@ -456,10 +1271,8 @@ def admin_add_opportunity():
             is_featured = 'is_featured' in request.form
             
             # Champs de postulation
-            steps = request.form.getlist('steps[]')
-            documents = request.form.getlist('documents[]')
-            postulation_steps = '|||'.join(steps) if steps else ''
-            documents_required = '|||'.join(documents) if documents else ''
+            steps = [step.strip() for step in request.form.getlist('steps[]') if step.strip()]
+            documents = [doc.strip() for doc in request.form.getlist('documents[]') if doc.strip()]
             
             # Autres champs
             postulation_link = request.form.get('postulation_link', '')
@@ -471,34 +1284,8 @@ def admin_add_opportunity():
             deadline_str = request.form.get('deadline', '')
             deadline = datetime.strptime(deadline_str, '%Y-%m-%d').date() if deadline_str else None
             
-            # Gestion des images téléchargées
-            uploaded_image_urls = []
-            uploaded_public_ids = []
-            
-            # Traiter les fichiers uploadés
-            if 'images[]' in request.files:
-                image_files = request.files.getlist('images[]')
-                for image_file in image_files:
-                    if image_file and image_file.filename != '':
-                        try:
-                            # Upload vers Cloudinary
-                            upload_result = cloudinary.uploader.upload(
-                                image_file,
-                                folder="zonebourse/opportunities",
-                                transformation=[
-                                    {'width': 1200, 'height': 800, 'crop': 'limit'},
-                                    {'quality': 'auto:good'}
-                                ]
-                            )
-                            uploaded_image_urls.append(upload_result['secure_url'])
-                            uploaded_public_ids.append(upload_result['public_id'])
-                        except Exception as upload_error:
-                            print(f"Erreur d'upload Cloudinary: {upload_error}")
-                            flash(f"Erreur avec l'image {image_file.filename}: {upload_error}", 'warning')
-            
-            # Convertir les listes en chaînes
-            image_urls_str = '|||'.join(uploaded_image_urls)
-            image_public_ids_str = '|||'.join(uploaded_public_ids)
+            # Images lues maintenant, envoyées en arrière-plan après l'enregistrement
+            pending_files = read_pending_files(request.files.getlist('images[]'))
             
             # Créer la nouvelle opportunité
             new_opportunity = Opportunity(
@@ -509,20 +1296,24 @@ def admin_add_opportunity():
                 montant=montant,
                 deadline=deadline,
                 is_featured=is_featured,
-                postulation_steps=postulation_steps,
-                documents_required=documents_required,
                 postulation_link=postulation_link,
                 contact_email=contact_email,
                 contact_phone=contact_phone,
-                image_urls=image_urls_str,
-                image_public_ids=image_public_ids_str,
-                video_url=video_url
+                video_url=video_url,
+                steps=[OpportunityStep(position=i, content=step) for i, step in enumerate(steps)],
+                documents=[OpportunityDocument(position=i, content=doc) for i, doc in enumerate(documents)],
+                media_status='pending' if pending_files else 'ready'
             )
             
             db.session.add(new_opportunity)
             db.session.commit()
+            catalogue_cache.bump()
             
-            flash('Opportunité ajoutée avec succès!', 'success')
+            if pending_files:
+                upload_queue.submit(process_pending_images, new_opportunity.id, pending_files)
+                flash(f'Opportunité ajoutée avec succès! {len(pending_files)} image(s) en cours d\'envoi.', 'success')
+            else:
+                flash('Opportunité ajoutée avec succès!', 'success')
             return redirect(url_for('admin_opportunities'))
             
         except Exception as e:
@@ -532,14 +1323,31 @@ def admin_add_opportunity():
     return render_template('admin_add_opportunity.html',
                          user={'nom': session['user_nom'], 'prenom': session['user_prenom']})
 
-@app.route('/admin/delete-image/<public_id>', methods=['DELETE'])
+@app.route('/media/<path:key>')
+def serve_media(key):
+    """Fichiers des stockages local et mémoire, adressés par leur contenu donc immuables"""
+    data = media_storage.read(key)
+    if data is None:
+        return jsonify({'error': 'Fichier introuvable'}), 404
+    
+    response = app.response_class(data, mimetype=content_type(key))
+    response.cache_control.public = True
+    response.cache_control.max_age = 31536000
+    response.cache_control.immutable = True
+    response.set_etag(os.path.splitext(key.rsplit('/', 1)[-1])[0])
+    return response.make_conditional(request)
+
+@app.route('/admin/delete-image/<path:public_id>', methods=['DELETE'])
 def delete_image(public_id):
     if 'user_id' not in session or not session.get('is_admin'):
         return jsonify({'success': False, 'error': 'Non autorisé'}), 403
     
+    if referenced_public_ids([public_id]):
+        return jsonify({'success': False, 'error': 'Image encore utilisée par une opportunité'}), 409
+    
     try:
-        result = cloudinary.uploader.destroy(public_id)
-        return jsonify({'success': True, 'result': result})
+        deleted = media_storage.delete(public_id)
+        return jsonify({'success': True, 'result': 'ok' if deleted else 'not found'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -561,6 +1369,7 @@ def admin_edit_opportunity(id):
             opportunity.is_featured = 'is_featured' in request.form
             
             db.session.commit()
+            catalogue_cache.bump()
             flash('Opportunité mise à jour avec succès!', 'success')
             return redirect(url_for('admin_opportunities'))
             
@@ -579,8 +1388,12 @@ def admin_delete_opportunity(id):
     
     try:
         opportunity = Opportunity.query.get_or_404(id)
+        public_ids = [image.public_id for image in opportunity.images] + \
+                     [variant.public_id for image in opportunity.images for variant in image.variants]
         db.session.delete(opportunity)
         db.session.commit()
+        catalogue_cache.bump()
+        upload_queue.submit(release_media, public_ids)
         return jsonify({'success': True})
     except Exception as e:
         db.session.rollback()
@@ -726,30 +1539,13 @@ from datetime import datetime
 @app.route('/opportunity/<int:opportunity_id>')
 def opportunity_details(opportunity_id):
     """Afficher les détails complets d'une opportunité"""
-    if 'user_id' not in session:
+    user = get_current_user()
+    if not user:
         flash('Veuillez vous connecter pour voir les détails.', 'error')
         return redirect(url_for('login'))
     
-    # Récupérer l'opportunité
-    opportunity = Opportunity.query.get_or_404(opportunity_id)
-    
-    # Récupérer l'utilisateur
-    user = User.query.get(session['user_id'])
-    
-    # Traiter les étapes de postulation
-    steps = []
-    if opportunity.postulation_steps:
-        steps = [step.strip() for step in opportunity.postulation_steps.split('|||') if step.strip()]
-    
-    # Traiter les documents requis
-    documents = []
-    if opportunity.documents_required:
-        documents = [doc.strip() for doc in opportunity.documents_required.split('|||') if doc.strip()]
-    
-    # Traiter les images
-    images = []
-    if opportunity.image_urls:
-        images = [img.strip() for img in opportunity.image_urls.split('|||') if img.strip()]
+    # Récupérer l'opportunité avec ses étapes, documents et images
+    opportunity = Opportunity.query.options(*DETAIL_LOAD_OPTIONS).filter_by(id=opportunity_id).first_or_404()
     
     # Récupérer d'autres opportunités similaires (pour la section "Autres opportunités")
     related_opportunities = Opportunity.query.filter(
@@ -759,10 +1555,10 @@ def opportunity_details(opportunity_id):
     
     return render_template('opportunity_details.html',
                          opportunity=opportunity,
-                         user={'nom': user.nom, 'prenom': user.prenom},
-                         steps=steps,
-                         documents=documents,
-                         images=images,
+                         user=user,
+                         steps=[step.content for step in opportunity.steps],
+                         documents=[doc.content for doc in opportunity.documents],
+                         images=[image.url for image in opportunity.images],
                          related_opportunities=related_opportunities,
                          now=datetime.now())
 
@@ -802,24 +1598,14 @@ def admin_users():
 @app.route('/api/me', methods=['GET'])
 def api_get_current_user():
     """Récupérer l'utilisateur connecté - Version API"""
-    if 'user_id' not in session:
-        return jsonify({'authenticated': False}), 401
-    
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     if not user:
         return jsonify({'authenticated': False}), 401
     
     return jsonify({
         'authenticated': True,
-        'id': user.id,
-        'nom': user.nom,
-        'prenom': user.prenom,
-        'numero': user.numero,
-        'email': user.email,
-        'is_admin': user.is_admin,
-        'is_active': user.is_active,
-        'subscription_days': user.subscription_days,
-        'subscription_expiry': user.subscription_expiry.isoformat() if user.subscription_expiry else None
+        **{key: user[key] for key in ('id', 'nom', 'prenom', 'numero', 'email', 'is_admin', 'is_active',
+                                      'subscription_days', 'subscription_expiry')}
     })
 
 @app.route('/api/login', methods=['POST'])
@@ -851,7 +1637,9 @@ def api_login():
                     'numero': user.numero,
                     'email': user.email,
                     'is_admin': is_admin_value  # ← Force en booléen True/False
-                }
+                },
+                # Mode jeton : Authorization: Bearer <access_token>, renouvelé via /api/token/refresh
+                **create_tokens(user, app.config, token_blocklist)
             })
         else:
             return jsonify({'success': False, 'error': 'Compte désactivé'}), 401
@@ -893,131 +1681,238 @@ def api_register():
     
     return jsonify({'success': True, 'message': 'Inscription réussie'})
 
+@app.route('/api/token/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def api_refresh_token():
+    """Nouveau jeton d'accès (Authorization: Bearer <refresh_token>), avec l'utilisateur relu en base"""
+    user = db.session.get(User, int(get_jwt()['sub']))
+    if not user or not user.is_active:
+        token_blocklist.revoke_token(get_jwt())
+        return jsonify({'error': 'Compte désactivé ou supprimé', 'code': 'account_disabled'}), 401
+    
+    return jsonify(create_tokens(user, app.config, token_blocklist, refresh=False))
+
 @app.route('/api/logout', methods=['POST'])
 def api_logout():
-    """API de déconnexion"""
+    """API de déconnexion (révoque le jeton d'accès et le refresh_token envoyé)"""
     session.clear()
+    # Le jeton d'accès est souvent déjà expiré : il ne doit pas empêcher la révocation du refresh_token
+    claims = api_claims(strict=False)
+    if claims:
+        token_blocklist.revoke_token(claims)
+    refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+    if refresh_token:
+        try:
+            token_blocklist.revoke_token(decode_token(refresh_token))
+        except (PyJWTError, JWTExtendedException):
+            pass  # Jeton déjà expiré ou invalide
     return jsonify({'success': True})
 
 @app.route('/api/opportunities', methods=['GET'])
+@read_replica
+@conditional_get()
 def api_get_opportunities():
-    """Récupérer toutes les opportunités - Version API"""
-    opportunities = Opportunity.query.order_by(Opportunity.created_at.desc()).all()
+    """Récupérer les opportunités page par page (?cursor=&limit=&fields=) - Version API"""
+    cursor = request.args.get('cursor')
+    limit = get_page_size()
     
-    return jsonify({
-        'opportunities': [{
-            'id': opp.id,
-            'title': opp.title,
-            'type': opp.type,
-            'description': opp.description[:200] + '...' if len(opp.description) > 200 else opp.description,
-            'pays': opp.pays,
-            'montant': opp.montant,
-            'is_featured': opp.is_featured,
-            'image_urls': opp.image_urls,
-            'deadline': opp.deadline.isoformat() if opp.deadline else None,
-            'created_at': opp.created_at.isoformat()
-        } for opp in opportunities]
-    })
+    try:
+        fields = get_fields()
+        
+        def build():
+            if fields:
+                rows, next_cursor = paginate_opportunities(projection_query(fields), cursor, limit)
+                return projection_page_body(rows, next_cursor, fields)
+            opportunities, next_cursor = paginate_opportunities(
+                Opportunity.query.options(SUMMARY_COLUMNS), cursor, limit
+            )
+            return summary_page_body(opportunities, next_cursor)
+        
+        fields_key = ','.join(fields) if fields else '*'
+        return cached_json_response(f'opportunities:{cursor}:{limit}:{fields_key}', build)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/opportunities/changes', methods=['GET'])
+def api_get_opportunity_changes():
+    """Opportunités créées, modifiées ou supprimées depuis un jeton de synchronisation - Version API
+
+    Sans jeton (ou since=0), tout le catalogue est renvoyé. Si trop de
+    changements se sont accumulés, reset=true demande au client de
+    recharger le catalogue via /api/opportunities.
+    """
+    try:
+        since = int(request.args.get('since') or 0)
+    except ValueError:
+        return jsonify({'error': 'Jeton de synchronisation invalide'}), 400
+    
+    current = db.session.execute(db.select(CatalogueState.version).where(CatalogueState.id == 1)).scalar() or 0
+    if since < 0 or since > current:
+        return jsonify({'reset': True, 'sync_token': str(current), 'changes': [], 'deleted': []})
+    
+    max_changes = app.config['SYNC_MAX_CHANGES']
+    # since=0 : tout le catalogue, y compris les lignes antérieures à la migration
+    # 0005 (restées en révision 0) qui n'apparaissent dans aucun delta
+    window = Opportunity.revision <= current
+    if since:
+        window = db.and_(Opportunity.revision > since, window)
+    changed = Opportunity.query.filter(window) \
+        .options(db.load_only(Opportunity.id, Opportunity.revision, Opportunity.updated_at, Opportunity.summary_json)) \
+        .order_by(Opportunity.revision, Opportunity.id).limit(max_changes + 1).all()
+    if len(changed) > max_changes:
+        return jsonify({'reset': True, 'sync_token': str(current), 'changes': [], 'deleted': []})
+    
+    # Un identifiant réutilisé après suppression n'est supprimé que si la suppression est plus récente
+    revisions = {opp.id: opp.revision for opp in changed}
+    tombstones = db.session.execute(
+        db.select(OpportunityTombstone.opportunity_id, db.func.max(OpportunityTombstone.revision))
+        .where(OpportunityTombstone.revision > since, OpportunityTombstone.revision <= current)
+        .group_by(OpportunityTombstone.opportunity_id)
+    ).all()
+    deleted = [opportunity_id for opportunity_id, revision in tombstones
+               if revision > revisions.get(opportunity_id, 0)]
+    
+    return app.response_class(changes_page_body(changed, deleted, current), mimetype='application/json')
+
+@app.route('/api/opportunities/search', methods=['GET'])
+@read_replica
+def api_search_opportunities():
+    """Recherche plein texte classée par pertinence (?q=&page=&per_page=&type=) - Version API"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Paramètre q requis'}), 400
+    
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = max(1, min(request.args.get('per_page', type=int) or app.config['OPPORTUNITIES_PAGE_SIZE'],
+                          app.config['OPPORTUNITIES_MAX_PAGE_SIZE']))
+    
+    results = search_opportunities(db.session, query, page=page, per_page=per_page,
+                                   type=request.args.get('type') or None)
+    return jsonify(results)
 
 @app.route('/api/opportunities/<int:opportunity_id>', methods=['GET'])
+@read_replica
 def api_get_opportunity_detail(opportunity_id):
     """Récupérer les détails complets d'une opportunité - Version API"""
-    opportunity = Opportunity.query.get_or_404(opportunity_id)
+    def build():
+        opportunity = Opportunity.query.options(*DETAIL_LOAD_OPTIONS).filter_by(id=opportunity_id).first_or_404()
+        return serialize_opportunity_detail(opportunity)
     
-    # Traiter les listes
-    images = opportunity.image_urls.split('|||') if opportunity.image_urls else []
-    steps = opportunity.postulation_steps.split('|||') if opportunity.postulation_steps else []
-    documents = opportunity.documents_required.split('|||') if opportunity.documents_required else []
+    return cached_json_response(f'opportunity:{opportunity_id}', build)
+
+@app.route('/api/opportunities/batch', methods=['GET'])
+@read_replica
+@conditional_get()
+def api_get_opportunities_batch():
+    """Plusieurs opportunités en une requête (?ids=1,2,3), dans l'ordre demandé - Version API
+
+    Sans fields, représentation complète (comme /api/opportunities/<id>) ;
+    avec fields, seulement les champs demandés.
+    """
+    try:
+        ids = list(dict.fromkeys(int(value) for value in request.args.get('ids', '').split(',') if value.strip()))
+    except ValueError:
+        return jsonify({'error': 'Identifiants invalides'}), 400
+    try:
+        fields = get_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not ids:
+        return jsonify({'error': 'Paramètre ids requis'}), 400
+    if len(ids) > app.config['OPPORTUNITIES_MAX_PAGE_SIZE']:
+        return jsonify({'error': f"Au plus {app.config['OPPORTUNITIES_MAX_PAGE_SIZE']} identifiants"}), 400
+    
+    if fields:
+        found = {row.id: serialize_projection(row, fields)
+                 for row in projection_query(fields).filter(Opportunity.id.in_(ids))}
+    else:
+        found = {opportunity.id: serialize_opportunity_detail(opportunity)
+                 for opportunity in Opportunity.query.options(*DETAIL_LOAD_OPTIONS).filter(Opportunity.id.in_(ids))}
     
     return jsonify({
-        'id': opportunity.id,
-        'title': opportunity.title,
-        'type': opportunity.type,
-        'description': opportunity.description,
-        'pays': opportunity.pays,
-        'montant': opportunity.montant,
-        'deadline': opportunity.deadline.isoformat() if opportunity.deadline else None,
-        'is_featured': opportunity.is_featured,
-        'images': images,
-        'postulation_steps': steps,
-        'documents_required': documents,
-        'postulation_link': opportunity.postulation_link,
-        'contact_email': opportunity.contact_email,
-        'contact_phone': opportunity.contact_phone,
-        'video_url': opportunity.video_url,
-        'created_at': opportunity.created_at.isoformat()
+        'opportunities': [found[opportunity_id] for opportunity_id in ids if opportunity_id in found],
+        'missing': [opportunity_id for opportunity_id in ids if opportunity_id not in found]
     })
 
 @app.route('/api/opportunities/featured', methods=['GET'])
+@read_replica
 def api_get_featured_opportunities():
     """Récupérer les opportunités en vedette - Version API"""
-    featured = Opportunity.query.filter_by(is_featured=True).order_by(Opportunity.created_at.desc()).limit(5).all()
-    
-    return jsonify({
-        'opportunities': [{
-            'id': opp.id,
-            'title': opp.title,
-            'type': opp.type,
-            'description': opp.description[:150] + '...' if len(opp.description) > 150 else opp.description,
-            'pays': opp.pays,
-            'montant': opp.montant,
-            'image_urls': opp.image_urls
-        } for opp in featured]
-    })
+    def build():
+        featured = Opportunity.query.filter_by(is_featured=True).options(*SUMMARY_LOAD_OPTIONS) \
+            .order_by(Opportunity.created_at.desc()).limit(5).all()
+        return {
+            'opportunities': [{
+                'id': opp.id,
+                'title': opp.title,
+                'type': opp.type,
+                'description': opp.description[:150] + '...' if len(opp.description) > 150 else opp.description,
+                'pays': opp.pays,
+                'montant': opp.montant,
+                'image_urls': opp.cover_image.url if opp.cover_image else None,
+                'thumbnail_url': thumbnail_url(opp, 'medium')
+            } for opp in featured]
+        }
+    
+    return cached_json_response('featured', build)
 
 @app.route('/api/opportunities/by-type/<string:type>', methods=['GET'])
+@read_replica
 def api_get_opportunities_by_type(type):
-    """Récupérer les opportunités par catégorie - Version API"""
-    opportunities = Opportunity.query.filter_by(type=type).order_by(Opportunity.created_at.desc()).all()
+    """Récupérer les opportunités par catégorie (?cursor=&limit=&fields=) - Version API"""
+    try:
+        fields = get_fields()
+        if fields:
+            rows, next_cursor = paginate_opportunities(
+                projection_query(fields).filter(Opportunity.type == type), request.args.get('cursor')
+            )
+            body = projection_page_body(rows, next_cursor, fields)
+        else:
+            opportunities, next_cursor = paginate_opportunities(
+                Opportunity.query.filter_by(type=type).options(SUMMARY_COLUMNS),
+                request.args.get('cursor')
+            )
+            body = summary_page_body(opportunities, next_cursor)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify({
-        'opportunities': [{
-            'id': opp.id,
-            'title': opp.title,
-            'type': opp.type,
-            'description': opp.description[:200] + '...' if len(opp.description) > 200 else opp.description,
-            'pays': opp.pays,
-            'montant': opp.montant,
-            'image_urls': opp.image_urls,
-            'deadline': opp.deadline.isoformat() if opp.deadline else None
-        } for opp in opportunities]
-    })
+    return app.response_class(body, mimetype='application/json')
 
 @app.route('/api/stats', methods=['GET'])
+@read_replica
+@conditional_get(include_users=True)
 def api_get_stats():
     """Récupérer les statistiques pour l'accueil - Version API"""
-    total_opportunities = Opportunity.query.count()
-    featured_count = Opportunity.query.filter_by(is_featured=True).count()
-    
-    all_pays = Opportunity.query.with_entities(Opportunity.pays).all()
-    unique_pays = len(set([p[0] for p in all_pays if p[0]]))
-    
-    total_users = User.query.count()
+    stats = get_stats()
     
     return jsonify({
-        'total_opportunities': total_opportunities,
-        'unique_pays': unique_pays or 45,
-        'total_users': total_users,
-        'featured_count': featured_count
+        'total_opportunities': stats['total_opportunities'],
+        'unique_pays': stats['unique_pays'] or 45,
+        'total_users': stats['total_users'],
+        'featured_count': stats['featured_opportunities']
     })
 
 @app.route('/api/categories', methods=['GET'])
+@read_replica
+@conditional_get()
 def api_get_categories():
     """Récupérer les catégories avec comptage - Version API"""
-    categories = [
-        {'id': 'bourse', 'name': 'Bourses', 'icon': 'school', 'description': 'Bourses d\'études'},
-        {'id': 'excellence', 'name': 'Excellence', 'icon': 'star', 'description': 'Programmes d\'excellence'},
-        {'id': 'admission', 'name': 'Admissions', 'icon': 'book-open', 'description': 'Admissions universitaires'}
-    ]
-    
-    for cat in categories:
-        cat['count'] = Opportunity.query.filter_by(type=cat['id']).count()
+    counts = count_by_type()
+    categories = [dict(category, count=counts.get(category['id'], 0)) for category in get_category_registry()]
     
     return jsonify({'categories': categories})
 
 @app.route('/api/check-session', methods=['GET'])
 def api_check_session():
     """Vérifier la session - Version API"""
+    claims = api_claims(strict=False)
+    if claims:
+        return jsonify({
+            'authenticated': True,
+            'is_admin': claims['is_admin'],
+            'user': {'nom': claims['nom'], 'prenom': claims['prenom'], 'numero': claims['numero']}
+        })
+    
     return jsonify({
         'authenticated': 'user_id' in session,
         'is_admin': session.get('is_admin', False),
@@ -1034,29 +1929,21 @@ def api_check_session():
 @app.route('/api/user/data', methods=['GET'])
 def get_user_data():
     """Récupérer les données personnelles de l'utilisateur"""
-    if 'user_id' not in session:
-        return jsonify({'error': 'Non authentifié'}), 401
-    
-    user = User.query.get(session['user_id'])
+    user = get_current_user()
     if not user:
-        return jsonify({'error': 'Utilisateur non trouvé'}), 404
+        return jsonify({'error': 'Non authentifié'}), 401
     
-    return jsonify({
-        'nom': user.nom,
-        'prenom': user.prenom,
-        'email': user.email,
-        'numero': user.numero,
-        'created_at': user.created_at.isoformat(),
-        'subscription_days': user.subscription_days,
-    })
+    return jsonify({key: user[key] for key in ('nom', 'prenom', 'email', 'numero', 'created_at',
+                                               'subscription_days')})
 
 @app.route('/api/user/delete', methods=['DELETE'])
 def delete_user_account():
     """Supprimer définitivement le compte utilisateur"""
-    if 'user_id' not in session:
+    current_user = get_current_user()
+    if not current_user:
         return jsonify({'error': 'Non authentifié'}), 401
     
-    user = User.query.get(session['user_id'])
+    user = db.session.get(User, current_user['id'])
     if not user:
         return jsonify({'error': 'Utilisateur non trouvé'}), 404
     
@@ -1080,18 +1967,37 @@ def admin_api_stats():
     if 'user_id' not in session or not session.get('is_admin'):
         return jsonify({'error': 'Non autorisé'}), 403
     
-    total_users = User.query.count()
-    active_users = User.query.filter_by(is_active=True).count()
-    total_opportunities = Opportunity.query.count()
-    featured_opportunities = Opportunity.query.filter_by(is_featured=True).count()
+    stats = get_stats()
     
     return jsonify({
-        'totalUsers': total_users,
-        'activeUsers': active_users,
-        'totalOpportunities': total_opportunities,
-        'featuredOpportunities': featured_opportunities,
+        'totalUsers': stats['total_users'],
+        'activeUsers': stats['active_users'],
+        'totalOpportunities': stats['total_opportunities'],
+        'featuredOpportunities': stats['featured_opportunities'],
     })
 
+@app.route('/admin/api/media-gc', methods=['GET', 'POST'])
+def admin_media_gc():
+    """POST : lancer le ramasse-miettes des médias en arrière-plan (?dry_run=1 pour simuler).
+    GET : état et rapport du dernier passage lancé sur ce worker"""
+    if 'user_id' not in session or not session.get('is_admin'):
+        return jsonify({'error': 'Non autorisé'}), 403
+    
+    if request.method == 'GET':
+        return jsonify(last_media_gc or {'status': 'never_run'})
+    
+    dry_run = request.args.get('dry_run') in ('1', 'true')
+    upload_queue.submit(media_gc_job, dry_run)
+    return jsonify({'success': True, 'dry_run': dry_run}), 202
+
+@app.route('/admin/api/db-pool', methods=['GET'])
+def admin_db_pool():
+    """État du pool de connexions de ce worker"""
+    if 'user_id' not in session or not session.get('is_admin'):
+        return jsonify({'error': 'Non autorisé'}), 403
+    
+    return jsonify({'pid': os.getpid(), **pool_status(db.engine)})
+
 @app.route('/admin/api/users', methods=['GET'])
 def admin_api_users():
     if 'user_id' not in session or not session.get('is_admin'):
@@ -0,0 +1,131 @@
+"""Authentification par jetons JWT pour l'API mobile.
+
+- Jeton d'accès de courte durée (JWT_ACCESS_MINUTES) portant l'identité de
+  l'utilisateur : les routes /api authentifiées n'ont plus besoin de relire
+  la ligne User.
+- Jeton de rafraîchissement (JWT_REFRESH_DAYS) : /api/token/refresh relit
+  l'utilisateur et émet un jeton d'accès avec des informations à jour.
+- Révocation : les jetons présentés à la déconnexion sont inscrits dans un
+  petit cache jusqu'à leur expiration. Modifier un utilisateur change sa
+  génération de jetons (claim gen) : ses jetons d'accès antérieurs sont refusés.
+  La liste est dans Redis dès que CACHE_REDIS_URL est défini, sinon en mémoire,
+  sans éviction, et valable pour un seul worker (gunicorn.conf.py n'en lance
+  alors qu'un par défaut).
+
+Les sessions par cookie restent acceptées par les mêmes routes.
+"""
+import time
+import uuid
+
+from flask import jsonify
+from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token
+
+from cache import ExpiringStore, create_cache
+
+
+# Champs copiés par user_claims
+USER_CLAIMS = ('nom', 'prenom', 'numero', 'email', 'is_admin', 'is_active',
+               'subscription_days', 'subscription_expiry', 'created_at')
+
+
+def user_claims(user):
+    """Informations de l'utilisateur copiées dans le jeton d'accès"""
+    return {
+        'nom': user.nom,
+        'prenom': user.prenom,
+        'numero': user.numero,
+        'email': user.email,
+        'is_admin': bool(user.is_admin),
+        'is_active': bool(user.is_active),
+        'subscription_days': user.subscription_days,
+        'subscription_expiry': user.subscription_expiry.isoformat() if user.subscription_expiry else None,
+        'created_at': user.created_at.isoformat() if user.created_at else None,
+    }
+
+
+def create_tokens(user, config, blocklist, refresh=True):
+    """Réponse de connexion : jeton d'accès (et de rafraîchissement)"""
+    claims = user_claims(user)
+    generation = blocklist.user_generation(user.id)
+    if generation is not None:
+        claims['gen'] = generation
+    tokens = {
+        'access_token': create_access_token(identity=str(user.id), additional_claims=claims),
+        'expires_in': int(config['JWT_ACCESS_TOKEN_EXPIRES'].total_seconds()),
+    }
+    if refresh:
+        tokens['refresh_token'] = create_refresh_token(identity=str(user.id))
+    return tokens
+
+
+class TokenBlocklist:
+    """Jetons révoqués, conservés jusqu'à leur expiration"""
+
+    def __init__(self, backend, user_ttl):
+        self.backend = backend
+        self.user_ttl = user_ttl  # Durée de vie d'un jeton d'accès
+
+    def revoke_token(self, payload):
+        ttl = max(int(payload['exp'] - time.time()), 1)
+        self.backend.set(f"jwt:revoked:{payload['jti']}", '1', ttl)
+
+    def revoke_user(self, user_id):
+        """Révoquer les jetons d'accès déjà émis pour cet utilisateur (le jeton de
+        rafraîchissement reste valable et donne un jeton d'accès à jour)"""
+        # Nouvelle génération plutôt qu'une date : un jeton émis dans la même
+        # seconde, avant ou après la révocation, est classé sans ambiguïté
+        self.backend.set(f"jwt:user:{user_id}", uuid.uuid4().hex, self.user_ttl)
+
+    def user_generation(self, user_id):
+        """Génération courante des jetons de l'utilisateur (None sans révocation récente)"""
+        generation = self.backend.get(f"jwt:user:{user_id}")
+        return generation.decode() if isinstance(generation, bytes) else generation
+
+    def is_revoked(self, payload):
+        if self.backend.get(f"jwt:revoked:{payload['jti']}") is not None:
+            return True
+        if payload.get('type') != 'access':
+            return False
+        generation = self.user_generation(payload['sub'])
+        return generation is not None and payload.get('gen') != generation
+
+
+def shared_blocklist(config):
+    """Vrai si la liste de révocation est commune à tous les workers (Redis)"""
+    return (config.get('CACHE_REDIS_URL') or 'local://') != 'local://'
+
+
+def create_blocklist(config):
+    """Liste de révocation : Redis dès que CACHE_REDIS_URL est défini, même si le
+    catalogue reste en mémoire, sinon un stockage en mémoire sans éviction"""
+    user_ttl = int(config['JWT_ACCESS_TOKEN_EXPIRES'].total_seconds())
+    if shared_blocklist(config):
+        return TokenBlocklist(create_cache(dict(config, CACHE_BACKEND='redis')), user_ttl=user_ttl)
+    return TokenBlocklist(ExpiringStore(default_ttl=user_ttl), user_ttl=user_ttl)
+
+
+def init_jwt(app, blocklist):
+    """Configurer Flask-JWT-Extended : révocation et erreurs au format de l'API"""
+    jwt = JWTManager(app)
+
+    @jwt.token_in_blocklist_loader
+    def check_revoked(jwt_header, jwt_payload):
+        return blocklist.is_revoked(jwt_payload)
+
+    @jwt.expired_token_loader
+    def expired_token(jwt_header, jwt_payload):
+        return jsonify({'error': 'Jeton expiré', 'code': 'token_expired'}), 401
+
+    @jwt.revoked_token_loader
+    def revoked_token(jwt_header, jwt_payload):
+        return jsonify({'error': 'Jeton révoqué', 'code': 'token_revoked'}), 401
+
+    @jwt.invalid_token_loader
+    def invalid_token(reason):
+        return jsonify({'error': f'Jeton invalide : {reason}', 'code': 'token_invalid'}), 401
+
+    @jwt.unauthorized_loader
+    def missing_token(reason):
+        return jsonify({'error': 'Non authentifié', 'code': 'token_missing'}), 401
+
+    return jwt
@@ -0,0 +1,108 @@
+"""Outils partagés des benchmarks : base de test, statistiques, résultats JSON."""
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+
+def default_database():
+    """Base SQLite jetable des benchmarks (hors du dépôt)"""
+    return 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'zonebourse-bench.db')
+
+
+def sqlite_path(database_url):
+    """Chemin du fichier d'une URL sqlite:///..., None pour les autres bases"""
+    if database_url.startswith('sqlite:///'):
+        return database_url[len('sqlite:///'):]
+    return None
+
+
+def use_database(database_url):
+    """Choisir la base avant l'import de app (l'application est créée à l'import)"""
+    if 'app' in sys.modules:
+        raise RuntimeError("use_database doit être appelé avant d'importer app")
+    os.environ['DATABASE_URL'] = database_url
+    # Pas d'appel réseau pendant les mesures
+    os.environ.setdefault('MEDIA_UPLOADER', 'fake')
+    os.environ.setdefault('MEDIA_STORAGE', 'memory')
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+
+def percentile(sorted_values, fraction):
+    """Percentile par interpolation linéaire sur des valeurs triées"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def latency_summary(durations):
+    """count, moyenne, p50, p95, p99 et max en millisecondes"""
+    values = sorted(durations)
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'mean_ms': round(sum(values) / len(values) * 1000, 3),
+        'p50_ms': round(percentile(values, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(values, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(values, 0.99) * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3),
+    }
+
+
+def git_revision():
+    """Commit courant et présence de modifications non commitées"""
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {'commit': git('rev-parse', 'HEAD'), 'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+
+def environment():
+    """Contexte d'une mesure, pour ne comparer que des résultats comparables"""
+    def available(module):
+        try:
+            __import__(module)
+            return True
+        except ImportError:
+            return False
+    return {
+        **git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'orjson': available('orjson'),
+        'pillow': available('PIL'),
+    }
+
+
+def save_results(kind, parameters, results, output=None):
+    """Enregistrer les résultats dans benchmarks/results/ (ou output) et retourner le chemin"""
+    env = environment()
+    document = {
+        'kind': kind,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': env,
+        'parameters': parameters,
+        'results': results,
+    }
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        commit = (env['commit'] or 'nogit')[:8] + ('-dirty' if env['dirty'] else '')
+        output = os.path.join(RESULTS_DIR, f"{kind}-{datetime.now():%Y%m%d-%H%M%S}-{commit}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+    return output
@@ -0,0 +1,70 @@
+"""Comparer deux fichiers de résultats (par exemple avant / après un commit).
+
+    python -m benchmarks.compare benchmarks/results/load-A.json benchmarks/results/load-B.json
+
+Affiche chaque mesure présente dans les deux fichiers avec son écart relatif.
+Les durées qui augmentent et les débits qui baissent sont marqués d'un « ! »
+au-delà de --threshold pour cent.
+"""
+import argparse
+import json
+import sys
+
+# Mesures comparées, et sens de l'amélioration
+LOWER_IS_BETTER = ('best_us', 'median_us', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'errors')
+HIGHER_IS_BETTER = ('throughput_rps',)
+
+
+def flatten(results, prefix=''):
+    """{'scenarios': {'api_list': {'p50_ms': 3}}} -> {'scenarios.api_list.p50_ms': 3}"""
+    values = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{prefix}{key}."))
+        elif key in LOWER_IS_BETTER + HIGHER_IS_BETTER and isinstance(value, (int, float)):
+            values[prefix + key] = value
+    return values
+
+
+def compare(before, after, threshold=5.0):
+    """Lignes (mesure, avant, après, écart en %, régression)"""
+    old, new = flatten(before['results']), flatten(after['results'])
+    rows = []
+    for name in old:
+        if name not in new:
+            continue
+        change = (new[name] - old[name]) / old[name] * 100 if old[name] else 0.0
+        worse = change < 0 if name.rsplit('.', 1)[-1] in HIGHER_IS_BETTER else change > 0
+        rows.append((name, old[name], new[name], change, worse and abs(change) >= threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=5.0, help="Écart signalé, en pour cent")
+    args = parser.parse_args(argv)
+    with open(args.before, encoding='utf-8') as f:
+        before = json.load(f)
+    with open(args.after, encoding='utf-8') as f:
+        after = json.load(f)
+
+    if before['kind'] != after['kind']:
+        raise SystemExit(f"Résultats de types différents : {before['kind']} et {after['kind']}")
+    for key in ('platform', 'cpu_count', 'orjson', 'pillow'):
+        if before['environment'].get(key) != after['environment'].get(key):
+            print(f"Attention : environnement différent ({key})")
+    if before['parameters'] != after['parameters']:
+        print("Attention : paramètres différents")
+
+    print(f"avant : {(before['environment']['commit'] or '?')[:8]}  après : {(after['environment']['commit'] or '?')[:8]}")
+    regressions = 0
+    for name, old, new, change, regression in compare(before, after, args.threshold):
+        regressions += regression
+        print(f"{'!' if regression else ' '} {name:45} {old:>12.2f} {new:>12.2f} {change:>+8.1f} %")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
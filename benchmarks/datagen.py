@@ -0,0 +1,189 @@
+"""Données synthétiques reproductibles pour les benchmarks.
+
+    python -m benchmarks.datagen --users 1000 --opportunities 5000 --reset
+
+Crée un administrateur de test, N utilisateurs et M opportunités avec leurs
+étapes, documents et images (avec miniatures), dans les proportions de la
+production : ce sont les anciennes listes '|||' de postulation_steps et
+image_urls, stockées depuis la migration 0003 dans les tables filles. La même
+graine donne les mêmes données, quelle que soit la machine.
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import default_database, sqlite_path, use_database
+
+# Comptes utilisés par le test de charge
+BENCH_PASSWORD = 'bench-password'
+ADMIN_NUMERO = '+000 0000000000'
+
+# Date de référence fixe : created_at et deadline ne dépendent pas du jour du lancement
+REFERENCE_DATE = datetime(2025, 1, 1)
+
+FIRST_NAMES = ['Awa', 'Koffi', 'Mariam', 'Yao', 'Fatou', 'Ibrahim', 'Aminata', 'Serge', 'Nadia', 'Moussa',
+               'Grace', 'Cheick', 'Estelle', 'Abdoulaye', 'Ruth', 'Kouassi', 'Salimata', 'Didier']
+LAST_NAMES = ['Kouamé', 'Traoré', 'Diallo', 'Konaté', 'Ouattara', 'Bamba', "N'Guessan", 'Coulibaly',
+              'Touré', 'Yapi', 'Koné', 'Sangaré', 'Aka', 'Doumbia', 'Kaboré', 'Sawadogo']
+COUNTRIES = ['France', 'Canada', 'Allemagne', 'Belgique', 'États-Unis', 'Chine', 'Maroc', 'Turquie',
+             'Royaume-Uni', 'Japon', 'Suisse', 'Hongrie', 'International', 'Europe, Amérique du Nord']
+AMOUNTS = ['Complet', 'Variable', '1 200 € / mois', '2 500 € / mois', '10 000 $ / an', 'Frais de scolarité',
+           '45 PAYS', '800 000 FCFA']
+TITLES = ['Bourse {} de master', "Programme d'excellence {}", 'Admission {} en licence', 'Bourse doctorale {}',
+          'Bourse du gouvernement {}', 'Programme {} pour jeunes chercheurs']
+WORDS = ("bourse études programme université candidature dossier sélection excellence académique "
+         "master licence doctorat recherche frais scolarité allocation mensuelle logement assurance "
+         "visa langue anglais français étudiants internationaux critères éligibilité date limite "
+         "relevés notes lettre motivation recommandation entretien résultats admission campus "
+         "formation ingénierie santé économie droit sciences sociales agriculture numérique").split()
+STEP_TEMPLATES = ["Créer un compte sur le portail de candidature et vérifier l'adresse e-mail",
+                  "Remplir le formulaire en ligne en indiquant le programme choisi et l'établissement",
+                  "Téléverser les relevés de notes traduits et certifiés conformes",
+                  "Rédiger une lettre de motivation de deux pages maximum",
+                  "Obtenir deux lettres de recommandation d'enseignants ou d'employeurs",
+                  "Passer le test de langue et joindre l'attestation de résultats",
+                  "Soumettre le dossier avant la date limite et conserver le numéro de dossier",
+                  "Se présenter à l'entretien de sélection (en ligne ou à l'ambassade)"]
+DOCUMENTS = ['Passeport valide', 'Relevés de notes', 'Diplôme du baccalauréat', 'Lettre de motivation',
+             'Curriculum vitae', 'Lettres de recommandation', 'Certificat de langue', 'Acte de naissance',
+             'Projet de recherche', 'Photo d\'identité']
+MEDIA_FOLDER = 'zonebourse/opportunities'
+
+
+def user_numero(index):
+    """Numéro de téléphone du n-ième utilisateur de test"""
+    return f"+225 07{index:08d}"
+
+
+def sentence(rng, min_words=8, max_words=20):
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    return ' '.join(words).capitalize() + '.'
+
+
+def paragraph(rng, min_length, max_length):
+    target = rng.randint(min_length, max_length)
+    text = ''
+    while len(text) < target:
+        text += sentence(rng) + ' '
+    return text.strip()
+
+
+def fake_media(rng, folder, extension='webp'):
+    """URL et public_id au format de FakeUploader"""
+    public_id = f"{folder}/{hashlib.sha1(rng.randbytes(16)).hexdigest()[:20]}"
+    return f"https://fake.cloudinary/{public_id}.{extension}", public_id
+
+
+def build_user(app_module, rng, index):
+    return app_module.User(
+        nom=rng.choice(LAST_NAMES),
+        prenom=rng.choice(FIRST_NAMES),
+        numero=user_numero(index),
+        email=f"user{index}@bench.zonebourse.test",
+        password=BENCH_PASSWORD,
+        is_admin=False,
+        is_active=rng.random() < 0.8,
+        subscription_days=rng.choice([0, 0, 30, 90, 365]),
+        subscription_expiry=REFERENCE_DATE + timedelta(days=rng.randint(-60, 365)) if rng.random() < 0.6 else None,
+        created_at=REFERENCE_DATE - timedelta(minutes=rng.randint(0, 730 * 24 * 60))
+    )
+
+
+def build_opportunity(app_module, rng, types):
+    m = app_module
+    opportunity = m.Opportunity(
+        title=rng.choice(TITLES).format(rng.choice(COUNTRIES)),
+        type=rng.choice(types),
+        description=paragraph(rng, 300, 2500),
+        pays=rng.choice(COUNTRIES),
+        montant=rng.choice(AMOUNTS),
+        deadline=(REFERENCE_DATE + timedelta(days=rng.randint(-30, 400))).date() if rng.random() < 0.9 else None,
+        is_featured=rng.random() < 0.1,
+        postulation_link=f"https://candidature.example.org/{rng.randint(1000, 99999)}",
+        contact_email='contact@example.org' if rng.random() < 0.5 else None,
+        video_url='https://www.youtube.com/watch?v=dQw4w9WgXcQ' if rng.random() < 0.2 else None,
+        created_at=REFERENCE_DATE - timedelta(minutes=rng.randint(0, 730 * 24 * 60))
+    )
+    steps = rng.sample(STEP_TEMPLATES, rng.randint(3, len(STEP_TEMPLATES)))
+    opportunity.steps = [m.OpportunityStep(position=i, content=f"{step}. {sentence(rng, 4, 12)}")
+                         for i, step in enumerate(steps)]
+    opportunity.documents = [m.OpportunityDocument(position=i, content=document)
+                             for i, document in enumerate(rng.sample(DOCUMENTS, rng.randint(2, 6)))]
+    images = []
+    for position in range(rng.randint(1, 5)):
+        url, public_id = fake_media(rng, MEDIA_FOLDER)
+        image = m.OpportunityImage(position=position, url=url, public_id=public_id, width=1600, height=1067)
+        for name, width in (('small', 320), ('medium', 640)):
+            variant_url, variant_id = fake_media(rng, f"{MEDIA_FOLDER}/thumbnails")
+            image.variants.append(m.OpportunityImageVariant(name=name, url=variant_url, public_id=variant_id,
+                                                            width=width, height=width * 2 // 3))
+        images.append(image)
+    opportunity.images = images
+    return opportunity
+
+
+def generate(app_module, users=1000, opportunities=5000, seed=42, batch_size=500, log=print):
+    """Peupler la base de l'application (schéma créé par init_db)"""
+    m = app_module
+    rng = random.Random(seed)
+    with m.app.app_context():
+        types = [category['id'] for category in m.get_category_registry()] or ['bourse']
+
+        m.db.session.add(m.User(nom='Bench', prenom='Admin', numero=ADMIN_NUMERO,
+                                email='admin@bench.zonebourse.test', password=BENCH_PASSWORD,
+                                is_admin=True, is_active=True, subscription_days=9999))
+        for start in range(0, users, batch_size):
+            m.db.session.add_all(build_user(m, rng, index) for index in range(start, min(start + batch_size, users)))
+            m.db.session.commit()
+        log(f"{users} utilisateurs créés")
+
+        for start in range(0, opportunities, batch_size):
+            m.db.session.add_all(build_opportunity(m, rng, types)
+                                 for _ in range(start, min(start + batch_size, opportunities)))
+            m.db.session.commit()
+            log(f"{min(start + batch_size, opportunities)}/{opportunities} opportunités")
+
+
+def is_populated(app_module):
+    with app_module.app.app_context():
+        return app_module.User.query.filter_by(numero=ADMIN_NUMERO).first() is not None
+
+
+def prepare(database_url, users, opportunities, seed, reset=False, log=print):
+    """Créer (ou recréer avec reset) une base peuplée et retourner le module app.
+
+    Sans reset, une base déjà peuplée par datagen est réutilisée telle quelle.
+    """
+    path = sqlite_path(database_url)
+    if reset and path and os.path.exists(path):
+        os.remove(path)
+    use_database(database_url)
+    import app as app_module
+    app_module.init_db()
+    if is_populated(app_module):
+        log(f"Base existante réutilisée : {database_url}")
+        return app_module
+    start = time.perf_counter()
+    generate(app_module, users, opportunities, seed, log=log)
+    log(f"Données générées en {time.perf_counter() - start:.1f} s")
+    return app_module
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default=default_database(), help="URL de la base (SQLite temporaire par défaut)")
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--opportunities', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help="Recréer la base SQLite si elle existe")
+    args = parser.parse_args(argv)
+    prepare(args.database, args.users, args.opportunities, args.seed, reset=args.reset)
+    print(f"Base prête : {args.database}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""Test de charge de l'API contre un gunicorn lancé localement.
+
+    python -m benchmarks.loadtest [--duration 30] [--concurrency 16] [--workers 2] [--worker-class sync]
+
+Le serveur est démarré avec gunicorn.conf.py sur une base générée par datagen,
+avec FakeUploader et le stockage en mémoire à la place de Cloudinary. Chaque
+client (un thread) enchaîne des requêtes tirées au hasard selon les poids de
+SCENARIOS, sans pause. Les requêtes de la période de chauffe ne sont pas
+comptées. Rapport : p50 / p95 / p99 et débit, par scénario et au total.
+
+Les clients tournent sur la même machine que le serveur : ne comparer que des
+résultats obtenus sur la même machine avec les mêmes paramètres.
+"""
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks import datagen
+from benchmarks.common import ROOT, default_database, latency_summary, save_results
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+UPLOAD_IMAGE = os.path.join(ROOT, 'static', 'images', 'profil.jpg')
+
+
+class Client:
+    """Un utilisateur simulé : session utilisateur et session administrateur"""
+
+    def __init__(self, base_url, numero):
+        self.base_url = base_url
+        self.user = requests.Session()
+        self.admin = requests.Session()
+        login(self.user, base_url, numero)
+        login(self.admin, base_url, datagen.ADMIN_NUMERO)
+
+    def get(self, path, **kwargs):
+        return self.user.get(self.base_url + path, allow_redirects=False, **kwargs)
+
+
+def login(http, base_url, numero):
+    response = http.post(f"{base_url}/login", data={'numero': numero, 'password': datagen.BENCH_PASSWORD},
+                         allow_redirects=False)
+    if response.status_code != 302 or 'session' not in http.cookies:
+        raise RuntimeError(f"Connexion impossible pour {numero} ({response.status_code})")
+
+
+def upload_images(client, rng, ctx):
+    files = [('images[]', (f"photo-{rng.randrange(10**9)}.jpg", ctx['image'], 'image/jpeg')) for _ in range(2)]
+    return client.admin.post(client.base_url + '/admin/upload-images', files=files)
+
+
+# (nom, poids, requête) : répartition proche du trafic de l'application mobile
+SCENARIOS = [
+    ('api_list', 30, lambda client, rng, ctx: client.get('/api/opportunities')),
+    ('api_list_next_page', 10, lambda client, rng, ctx: client.get('/api/opportunities',
+                                                                   params={'cursor': ctx['cursor']})),
+    ('api_detail', 20, lambda client, rng, ctx: client.get(f"/api/opportunities/{rng.choice(ctx['ids'])}")),
+    ('api_by_type', 10, lambda client, rng, ctx: client.get(f"/api/opportunities/by-type/{rng.choice(ctx['types'])}")),
+    ('api_search', 10, lambda client, rng, ctx: client.get('/api/opportunities/search',
+                                                           params={'q': rng.choice(datagen.WORDS)})),
+    ('api_featured', 5, lambda client, rng, ctx: client.get('/api/opportunities/featured')),
+    ('api_categories', 5, lambda client, rng, ctx: client.get('/api/categories')),
+    ('dashboard', 8, lambda client, rng, ctx: client.get('/dashboard')),
+    ('upload_images', 2, upload_images),
+]
+
+
+def start_server(args, database_url, workdir):
+    """Lancer gunicorn en arrière-plan ; sa sortie va dans workdir/gunicorn.log"""
+    env = {
+        **os.environ,
+        'DATABASE_URL': database_url,
+        'PORT': str(args.port),
+        'WEB_CONCURRENCY': str(args.workers),
+        'GUNICORN_WORKER_CLASS': args.worker_class,
+        'GUNICORN_THREADS': str(args.threads),
+        'MEDIA_UPLOADER': 'fake',
+        'MEDIA_STORAGE': 'memory',
+        'PROMETHEUS_MULTIPROC_DIR': os.path.join(workdir, 'metrics'),
+    }
+    if args.no_cache:
+        env['CACHE_BACKEND'] = 'null'
+    with open(os.path.join(workdir, 'gunicorn.log'), 'w') as log:
+        process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+                                   cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{args.port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            if requests.get(base_url + '/api/categories', timeout=1).ok:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    stop_server(process)
+    with open(os.path.join(workdir, 'gunicorn.log')) as f:
+        raise SystemExit(f"gunicorn n'a pas démarré :\n{f.read()[-2000:]}")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def client_loop(client, ctx, seed, measure_from, until, records):
+    """Enchaîner les scénarios jusqu'à until ; records reçoit (nom, durée, succès)"""
+    rng = random.Random(seed)
+    weights = [weight for _, weight, _ in SCENARIOS]
+    while True:
+        name, _, request = rng.choices(SCENARIOS, weights)[0]
+        start = time.perf_counter()
+        if start >= until:
+            return
+        try:
+            ok = request(client, rng, ctx).status_code < 400
+        except requests.RequestException:
+            ok = False
+        if start >= measure_from:
+            records.append((name, time.perf_counter() - start, ok))
+
+
+def report(records, elapsed):
+    """Statistiques par scénario et au total"""
+    def stats(selected):
+        return {
+            **latency_summary([duration for _, duration, _ in selected]),
+            'errors': sum(1 for _, _, ok in selected if not ok),
+            'throughput_rps': round(len(selected) / elapsed, 2),
+        }
+    results = {'overall': stats(records), 'scenarios': {}}
+    for name, _, _ in SCENARIOS:
+        selected = [record for record in records if record[0] == name]
+        if selected:
+            results['scenarios'][name] = stats(selected)
+    return results
+
+
+def print_report(results):
+    print(f"{'scénario':22} {'requêtes':>9} {'erreurs':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = list(results['scenarios'].items()) + [('total', results['overall'])]
+    for name, row in rows:
+        print(f"{name:22} {row['count']:>9} {row['errors']:>8} {row['throughput_rps']:>9.1f} "
+              f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default=default_database())
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--opportunities', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep-data', action='store_true', help="Réutiliser la base si elle est déjà peuplée")
+    parser.add_argument('--duration', type=float, default=30, help="Durée mesurée, en secondes")
+    parser.add_argument('--warmup', type=float, default=5, help="Chauffe non mesurée, en secondes")
+    parser.add_argument('--concurrency', type=int, default=16, help="Nombre de clients simultanés")
+    parser.add_argument('--port', type=int, default=5077)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--worker-class', default='sync')
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--no-cache', action='store_true', help="Désactiver le cache du catalogue (CACHE_BACKEND=null)")
+    parser.add_argument('--output', help="Fichier JSON (par défaut benchmarks/results/)")
+    args = parser.parse_args(argv)
+    if requests is None:
+        raise SystemExit("Le test de charge nécessite le paquet requests")
+
+    m = datagen.prepare(args.database, args.users, args.opportunities, args.seed, reset=not args.keep_data)
+    with m.app.app_context():
+        ids = [row[0] for row in m.db.session.execute(m.db.select(m.Opportunity.id)).all()]
+        types = [category['id'] for category in m.get_category_registry()]
+        numeros = m.db.session.execute(
+            m.db.select(m.User.numero).where(m.User.is_active == True, m.User.is_admin == False)
+            .order_by(m.User.id).limit(args.concurrency)
+        ).scalars().all() or [datagen.ADMIN_NUMERO]
+        m.db.engine.dispose()  # La base est rendue au serveur
+
+    workdir = tempfile.mkdtemp(prefix='zonebourse-loadtest-')
+    process, base_url = start_server(args, args.database, workdir)
+    try:
+        with open(UPLOAD_IMAGE, 'rb') as f:
+            image = f.read()
+        first_page = requests.get(base_url + '/api/opportunities').json()
+        ctx = {'ids': ids, 'types': types, 'cursor': first_page.get('next_cursor'), 'image': image}
+        clients = [Client(base_url, numeros[i % len(numeros)]) for i in range(args.concurrency)]
+
+        print(f"{args.concurrency} clients, {args.workers} workers {args.worker_class}, "
+              f"{args.warmup:.0f} s de chauffe puis {args.duration:.0f} s mesurées")
+        measure_from = time.perf_counter() + args.warmup
+        until = measure_from + args.duration
+        per_client = [[] for _ in clients]
+        threads = [threading.Thread(target=client_loop, args=(client, ctx, args.seed + i, measure_from, until, records))
+                   for i, (client, records) in enumerate(zip(clients, per_client))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        stop_server(process)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = report([record for records in per_client for record in records], args.duration)
+    print_report(results)
+    parameters = {key: value for key, value in vars(args).items() if key not in ('output', 'database')}
+    parameters['scenarios'] = {name: weight for name, weight, _ in SCENARIOS}
+    print(f"Résultats : {save_results('load', parameters, results, args.output)}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Microbenchmarks : sérialisation JSON et rendu des templates.
+
+    python -m benchmarks.micro [--users 500 --opportunities 1000] [--repeat 7]
+
+Les données sont chargées une fois, avant les mesures : seuls la
+sérialisation et le rendu sont chronométrés, pas les requêtes SQL.
+"""
+import argparse
+import json
+import statistics
+import sys
+import timeit
+
+from benchmarks import datagen
+from benchmarks.common import default_database, save_results
+
+
+def measure(function, number, repeat):
+    """Durée par appel (meilleure et médiane des répétitions), en microsecondes"""
+    timings = timeit.repeat(function, number=number, repeat=repeat)
+    return {
+        'number': number,
+        'repeat': repeat,
+        'best_us': round(min(timings) / number * 1e6, 2),
+        'median_us': round(statistics.median(timings) / number * 1e6, 2),
+    }
+
+
+def calibrate(function, target_seconds=0.2):
+    """Nombre d'appels pour qu'une répétition dure environ target_seconds"""
+    number = 1
+    while True:
+        elapsed = timeit.timeit(function, number=number)
+        if elapsed >= target_seconds or number >= 1_000_000:
+            return number
+        number = max(number * 2, int(number * target_seconds / max(elapsed, 1e-9)))
+
+
+def run(m, repeat=7, log=print):
+    """Exécuter les microbenchmarks avec le module app déjà peuplé"""
+    app = m.app
+    benchmarks = {}
+    # Contexte de requête : pagination (?limit=), url_for et session dans les templates
+    with app.test_request_context('/dashboard'):
+        page_size = app.config['OPPORTUNITIES_PAGE_SIZE']
+        page, next_cursor = m.paginate_opportunities(m.Opportunity.query.options(*m.SUMMARY_LOAD_OPTIONS))
+        fragments_page, _ = m.paginate_opportunities(m.Opportunity.query.options(m.SUMMARY_COLUMNS))
+        details = m.Opportunity.query.options(*m.DETAIL_LOAD_OPTIONS).limit(page_size).all()
+        users = m.User.query.all()
+        payload = {'opportunities': [m.serialize_opportunity_summary(opp) for opp in page],
+                   'next_cursor': next_cursor}
+        detail_payloads = [m.serialize_opportunity_detail(opp) for opp in details]
+
+        cases = {
+            # Construction des résumés depuis les objets (ancien chemin des listes)
+            'summary_page_build': lambda: [m.serialize_opportunity_summary(opp) for opp in page],
+            # Corps de liste par concaténation des résumés précalculés
+            'summary_page_precomputed': lambda: m.summary_page_body(fragments_page, next_cursor),
+            'page_dumps_app_json': lambda: app.json.dumps(payload),
+            'page_dumps_stdlib_json': lambda: json.dumps(payload, separators=(',', ':'), sort_keys=True,
+                                                         ensure_ascii=False),
+            'detail_serialize': lambda: [m.serialize_opportunity_detail(opp) for opp in details],
+            'detail_dumps_app_json': lambda: [app.json.dumps(item) for item in detail_payloads],
+        }
+        for name, function in cases.items():
+            benchmarks[name] = measure(function, calibrate(function), repeat)
+            log(f"{name:30} {benchmarks[name]['median_us']:>12.1f} µs")
+
+        template_user = {'nom': 'Bench', 'prenom': 'Admin'}
+        now = m.datetime.utcnow()
+        templates = {
+            'render_dashboard': lambda: m.render_template('dashboard.html', user=template_user,
+                                                          opportunities=page, next_cursor=next_cursor),
+            'render_admin_users': lambda: m.render_template('admin_users.html', user=template_user,
+                                                            users=users, now=now),
+        }
+        for name, function in templates.items():
+            function()  # Compilation du template et chargements paresseux hors mesure
+            benchmarks[name] = measure(function, calibrate(function), repeat)
+            log(f"{name:30} {benchmarks[name]['median_us']:>12.1f} µs")
+
+        sizes = {
+            'page_items': len(page),
+            'users_rendered': len(users),
+            'page_json_bytes': len(app.json.dumps(payload)),
+        }
+    return benchmarks, sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default=default_database())
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--opportunities', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--keep-data', action='store_true', help="Réutiliser la base si elle est déjà peuplée")
+    parser.add_argument('--output', help="Fichier JSON (par défaut benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    m = datagen.prepare(args.database, args.users, args.opportunities, args.seed, reset=not args.keep_data)
+    benchmarks, sizes = run(m, repeat=args.repeat)
+    parameters = {'users': args.users, 'opportunities': args.opportunities, 'seed': args.seed,
+                  'repeat': args.repeat, **sizes}
+    print(f"Résultats : {save_results('micro', parameters, benchmarks, args.output)}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""Cache des réponses du catalogue.
+
+Backends interchangeables :
+- LRUCache : en mémoire dans le processus, avec expiration (par défaut)
+- ExpiringStore : en mémoire, sans limite de taille ; une entrée ne disparaît
+  qu'à son expiration (liste de révocation des jetons)
+- SharedCache : partagé entre les workers via un client de type Redis
+  (redis.Redis ou LocalRedis, son remplaçant local pour les tests)
+- NullCache : cache désactivé
+
+L'invalidation se fait par numéro de version : les écritures admin
+incrémentent la version, les anciennes clés ne sont plus jamais lues et
+finissent par expirer.
+"""
+import heapq
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Cache LRU en mémoire, borné en nombre d'entrées, avec TTL"""
+
+    def __init__(self, max_entries=1024, default_ttl=60):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._counters = {}  # Jamais évincés : un numéro de version perdu servirait des données périmées
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._counters:
+                return self._counters[key]
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._counters.pop(key, None)
+
+    def incr(self, key):
+        """Incrémenter un compteur (sans expiration ni éviction)"""
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ExpiringStore:
+    """Entrées en mémoire conservées jusqu'à leur expiration, jamais évincées faute
+    de place : une révocation perdue rendrait le jeton de nouveau valide"""
+
+    def __init__(self, default_ttl=60):
+        self.default_ttl = default_ttl
+        self._entries = {}
+        self._expiries = []  # Tas (expires_at, key) pour purger les entrées expirées
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.monotonic()
+        expires_at = now + ttl
+        with self._lock:
+            self._purge(now)
+            self._entries[key] = (value, expires_at)
+            heapq.heappush(self._expiries, (expires_at, key))
+
+    def _purge(self, now):
+        while self._expiries and self._expiries[0][0] < now:
+            expires_at, key = heapq.heappop(self._expiries)
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == expires_at:
+                del self._entries[key]
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._expiries.clear()
+
+    def __len__(self):
+        with self._lock:
+            self._purge(time.monotonic())
+            return len(self._entries)
+
+
+class SharedCache:
+    """Cache partagé entre processus, au-dessus d'un client de type Redis"""
+
+    def __init__(self, client, prefix='zonebourse:', default_ttl=60):
+        self.client = client
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, value, ex=ttl or None)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+class LocalRedis:
+    """Remplaçant local du client Redis (sous-ensemble des commandes utilisées)"""
+
+    def __init__(self):
+        self._store = LRUCache(max_entries=100000, default_ttl=0)
+
+    def get(self, key):
+        value = self._store.get(key)
+        if isinstance(value, int):
+            return str(value).encode()
+        return value.encode() if isinstance(value, str) else value
+
+    def set(self, key, value, ex=None):
+        self._store.set(key, value, ttl=ex or 0)
+        return True
+
+    def delete(self, key):
+        self._store.delete(key)
+        return 1
+
+    def incr(self, key):
+        return self._store.incr(key)
+
+    def scan_iter(self, match='*'):
+        prefix = match.rstrip('*')
+        keys = list(self._store._entries) + list(self._store._counters)
+        return [key for key in keys if key.startswith(prefix)]
+
+
+class NullCache:
+    """Cache désactivé"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def incr(self, key):
+        return 0
+
+    def clear(self):
+        pass
+
+
+def create_cache(config):
+    """Construire le cache choisi par CACHE_BACKEND (memory, redis ou null)"""
+    backend = config.get('CACHE_BACKEND', 'memory')
+    ttl = config.get('CACHE_TTL', 60)
+
+    if backend == 'memory':
+        return LRUCache(max_entries=config.get('CACHE_MAX_ENTRIES', 1024), default_ttl=ttl)
+    if backend == 'redis':
+        url = config.get('CACHE_REDIS_URL') or 'local://'
+        if url == 'local://':
+            return SharedCache(LocalRedis(), default_ttl=ttl)
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis nécessite le paquet redis (pip install redis)")
+        return SharedCache(redis.Redis.from_url(url), default_ttl=ttl)
+    if backend == 'null':
+        return NullCache()
+    raise ValueError(f"CACHE_BACKEND inconnu : {backend}")
+
+
+class CatalogueCache:
+    """Cache versionné des réponses du catalogue"""
+
+    VERSION_KEY = 'catalogue:version'
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def version(self):
+        return int(self.backend.get(self.VERSION_KEY) or 0)
+
+    def bump(self):
+        """Invalider toutes les réponses en cache (appelé après une écriture)"""
+        return self.backend.incr(self.VERSION_KEY)
+
+    def get_or_build(self, key, build, ttl=None):
+        """Valeur en cache pour key, ou build() stockée si absente"""
+        versioned_key = f"catalogue:{self.version()}:{key}"
+        value = self.backend.get(versioned_key)
+        if value is None:
+            value = build()
+            self.backend.set(versioned_key, value, ttl)
+        return value
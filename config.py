@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,7 +10,96 @@ class Config:
     ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL') or 'pythamoua@gmail.com'
     ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD') or 'admin123'
 
+    # Jetons JWT de l'API mobile (Authorization: Bearer <jeton d'accès>)
+    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or SECRET_KEY
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.environ.get('JWT_ACCESS_MINUTES') or 15))
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.environ.get('JWT_REFRESH_DAYS') or 30))
+
     # Cloudinary Configuration
     CLOUDINARY_CLOUD_NAME = os.getenv('CLOUDINARY_CLOUD_NAME')
     CLOUDINARY_API_KEY = os.getenv('CLOUDINARY_API_KEY')
-    CLOUDINARY_API_SECRET = os.getenv('CLOUDINARY_API_SECRET')
\ No newline at end of file
+    CLOUDINARY_API_SECRET = os.getenv('CLOUDINARY_API_SECRET')
+    # Pagination par curseur des opportunités
+    OPPORTUNITIES_PAGE_SIZE = int(os.environ.get('OPPORTUNITIES_PAGE_SIZE') or 20)
+    OPPORTUNITIES_MAX_PAGE_SIZE = int(os.environ.get('OPPORTUNITIES_MAX_PAGE_SIZE') or 100)
+
+    # Cache des réponses du catalogue : memory (par worker), redis (partagé) ou null.
+    # Avec memory, les autres workers voient une écriture admin au plus tard après CACHE_TTL secondes.
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND') or 'memory'
+    CACHE_TTL = int(os.environ.get('CACHE_TTL', 60))
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES') or 1024)
+    # local:// pour le remplaçant en mémoire. Si défini, la révocation des jetons JWT y est toujours partagée
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+
+    # Synchronisation incrémentale : au-delà, le client doit recharger tout le catalogue
+    SYNC_MAX_CHANGES = int(os.environ.get('SYNC_MAX_CHANGES') or 500)
+
+    # Durée de mémorisation des statistiques agrégées (0 pour désactiver)
+    STATS_CACHE_TTL = int(os.environ.get('STATS_CACHE_TTL', 10))
+
+    # Durée de mémorisation du registre des catégories
+    CATEGORY_CACHE_TTL = int(os.environ.get('CATEGORY_CACHE_TTL') or 300)
+
+    # Résumés des utilisateurs connectés, par worker (0 pour désactiver). Vidés au
+    # commit d'une modification dans ce worker, expirés après USER_CACHE_TTL ailleurs
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 30))
+    USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES') or 2048)
+
+    # Threads d'upload des images en arrière-plan (0 : upload pendant la requête)
+    MEDIA_UPLOAD_WORKERS = int(os.environ.get('MEDIA_UPLOAD_WORKERS', 4))
+
+    # Envoi groupé des images : envois simultanés, nouvelles tentatives et délai initial (secondes)
+    MEDIA_UPLOAD_CONCURRENCY = int(os.environ.get('MEDIA_UPLOAD_CONCURRENCY') or 4)
+    MEDIA_UPLOAD_RETRIES = int(os.environ.get('MEDIA_UPLOAD_RETRIES', 2))
+    MEDIA_UPLOAD_BACKOFF = float(os.environ.get('MEDIA_UPLOAD_BACKOFF') or 0.5)
+    # cloudinary, ou fake pour un uploader local sans réseau (tests)
+    MEDIA_UPLOADER = os.environ.get('MEDIA_UPLOADER') or 'cloudinary'
+
+    # Préparation locale des images (Pillow) : taille maximale, format (webp, avif ou jpeg),
+    # qualité et miniatures générées (nom:largeur)
+    MEDIA_MAX_WIDTH = int(os.environ.get('MEDIA_MAX_WIDTH') or 1200)
+    MEDIA_MAX_HEIGHT = int(os.environ.get('MEDIA_MAX_HEIGHT') or 800)
+    MEDIA_IMAGE_FORMAT = os.environ.get('MEDIA_IMAGE_FORMAT') or 'webp'
+    MEDIA_IMAGE_QUALITY = int(os.environ.get('MEDIA_IMAGE_QUALITY') or 80)
+    MEDIA_THUMBNAIL_SIZES = os.environ.get('MEDIA_THUMBNAIL_SIZES') or 'small:320,medium:640'
+
+    # Stockage des médias : cloudinary, local (MEDIA_ROOT, par défaut instance/media) ou memory
+    MEDIA_STORAGE = os.environ.get('MEDIA_STORAGE') or 'cloudinary'
+    MEDIA_ROOT = os.environ.get('MEDIA_ROOT')
+    MEDIA_URL = os.environ.get('MEDIA_URL') or '/media'  # URL absolue pour les clients mobiles
+
+    # Ramasse-miettes des médias : fichiers supprimés par lot, pause entre deux lots (secondes)
+    # et âge minimal d'un fichier avant suppression (envois en cours)
+    MEDIA_GC_BATCH_SIZE = int(os.environ.get('MEDIA_GC_BATCH_SIZE') or 100)
+    MEDIA_GC_PAUSE = float(os.environ.get('MEDIA_GC_PAUSE', 1.0))
+    MEDIA_GC_MIN_AGE_HOURS = float(os.environ.get('MEDIA_GC_MIN_AGE_HOURS', 24))
+
+    # Pool de connexions (par worker) : workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    # doit rester sous max_connections de PostgreSQL
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 5)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 5))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT') or 10)
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE') or 1800)
+    DB_POOL_PRE_PING = (os.environ.get('DB_POOL_PRE_PING') or 'true').lower() in ('1', 'true', 'yes')
+    # Durée maximale d'une requête PostgreSQL en millisecondes (0 pour désactiver)
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 15000))
+
+    # Réplica PostgreSQL pour les lectures de l'API mobile (facultatif). Après une
+    # écriture, le client lit sur la base principale pendant REPLICA_STICKY_SECONDS
+    DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS') or 10)
+
+    # Niveau du journal de l'application (rapports des tâches d'arrière-plan en INFO)
+    LOG_LEVEL = (os.environ.get('LOG_LEVEL') or 'INFO').upper()
+
+    # Mesures par requête (en-tête Server-Timing, journal des requêtes lentes)
+    INSTRUMENTATION_ENABLED = (os.environ.get('INSTRUMENTATION_ENABLED') or 'false').lower() in ('1', 'true', 'yes')
+    SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS') or 500)
+    # Fraction des requêtes profilées avec cProfile (profil conservé si la requête est lente)
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_DIR = os.environ.get('PROFILE_DIR')  # Par défaut instance/profiles
+
+    # Métriques Prometheus sur /metrics (nécessite prometheus_client). Si
+    # METRICS_TOKEN est défini, le scraper envoie Authorization: Bearer <token>
+    METRICS_ENABLED = (os.environ.get('METRICS_ENABLED') or 'true').lower() in ('1', 'true', 'yes')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
@@ -0,0 +1,132 @@
+"""Pool de connexions à la base.
+
+Options du moteur SQLAlchemy construites depuis la configuration (taille,
+débordement, recyclage, pre-ping, timeout des requêtes PostgreSQL) et pool
+instrumenté pour suivre les temps d'attente d'une connexion.
+
+Dimensionnement : chaque worker gunicorn a son propre pool, donc
+workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) doit rester sous max_connections
+de PostgreSQL (moins les connexions réservées aux migrations et à l'admin).
+"""
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStats:
+    """Compteurs du pool, partagés par les threads d'un worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._observers = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.timeouts = 0
+            self.connects = 0
+            self.invalidated = 0
+
+    def add_observer(self, observer):
+        """Appeler observer(seconds, timed_out) à chaque attente (métriques)"""
+        self._observers.append(observer)
+
+    def record_wait(self, seconds, timed_out=False):
+        for observer in self._observers:
+            observer(seconds, timed_out)
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidate(self):
+        with self._lock:
+            self.invalidated += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'wait_avg_ms': round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+                'timeouts': self.timeouts,
+                'connects': self.connects,
+                'invalidated': self.invalidated,
+            }
+
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool qui mesure l'attente avant d'obtenir une connexion"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_stats.record_wait(time.perf_counter() - start)
+        return connection
+
+
+def engine_options(config, uri):
+    """SQLALCHEMY_ENGINE_OPTIONS pour l'URL de base donnée"""
+    if uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') == 'sqlite:'):
+        return {}  # Base en mémoire : une seule connexion, pas de pool
+
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+    if uri.startswith('postgresql') and config['DB_STATEMENT_TIMEOUT_MS']:
+        # Une requête bloquée ne garde pas une connexion du pool indéfiniment
+        options['connect_args'] = {'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"}
+    return options
+
+
+# Nouvelles connexions et connexions invalidées (redémarrage de la base, pre-ping en échec)
+@event.listens_for(TimedQueuePool, 'connect')
+def count_connect(dbapi_connection, connection_record):
+    pool_stats.record_connect()
+
+
+@event.listens_for(TimedQueuePool, 'invalidate')
+def count_invalidate(dbapi_connection, connection_record, exception):
+    pool_stats.record_invalidate()
+
+
+def pool_status(engine):
+    """État courant du pool du worker et compteurs cumulés"""
+    pool = engine.pool
+    status = {'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'max_overflow': pool._max_overflow,
+            'timeout': pool.timeout(),
+        })
+    status.update(pool_stats.snapshot())
+    return status
@@ -0,0 +1,108 @@
+"""Configuration gunicorn, pilotée par l'environnement.
+
+GUNICORN_WORKER_CLASS :
+- sync (par défaut) : un worker traite une requête à la fois
+- gthread : GUNICORN_THREADS requêtes par worker
+- gevent / eventlet : workers coopératifs, jusqu'à GUNICORN_WORKER_CONNECTIONS
+  clients par worker. Le réseau (Cloudinary, Redis) est rendu non bloquant par
+  le monkey-patching du worker, et psycopg2 par un callback d'attente
+  coopératif installé après le fork.
+
+En mode coopératif, les requêtes d'un worker partagent son pool SQLAlchemy
+(DB_POOL_SIZE + DB_MAX_OVERFLOW) : au-delà, elles attendent une connexion
+au plus DB_POOL_TIMEOUT secondes au lieu d'ouvrir de nouvelles connexions.
+
+Métriques : les workers écrivent leurs compteurs Prometheus dans
+PROMETHEUS_MULTIPROC_DIR, vidé au démarrage du master, pour que /metrics
+agrège tous les workers.
+
+Révocation des jetons JWT : sans CACHE_REDIS_URL, la liste de révocation est
+propre à chaque worker (une déconnexion ne vaudrait que pour l'un d'eux). Un
+seul worker est alors lancé par défaut ; un WEB_CONCURRENCY plus grand reste
+accepté, avec un avertissement au démarrage.
+"""
+import glob
+import os
+import tempfile
+
+from auth import shared_blocklist
+
+bind = f"0.0.0.0:{os.environ.get('PORT') or 5000}"
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS') or 'sync'
+# Pas de valeur dérivée du nombre de CPU : celui vu dans un conteneur Railway peut
+# être celui de l'hôte, et chaque worker ouvre son propre pool de connexions
+workers = int(os.environ.get('WEB_CONCURRENCY') or (2 if shared_blocklist(os.environ) else 1))
+threads = int(os.environ.get('GUNICORN_THREADS') or 1)
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS') or 500)
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT') or 30)
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT') or 30)
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE') or 5)
+
+# Recycler les workers périodiquement (fuites mémoire), avec un décalage aléatoire
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS') or 2000)
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER') or 200)
+
+accesslog = '-'
+
+# Doit être défini avant que les workers n'importent prometheus_client
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR',
+                      os.path.join(tempfile.gettempdir(), 'zonebourse-metrics'))
+
+
+def make_psycopg2_green():
+    """Attendre les réponses de PostgreSQL sans bloquer les autres greenlets"""
+    try:
+        import psycopg2
+        from psycopg2 import extensions
+    except ImportError:
+        return  # SQLite en local
+
+    if worker_class == 'eventlet':
+        from eventlet.support.psycopg2_patcher import make_psycopg_green
+        make_psycopg_green()
+        return
+
+    from gevent.socket import wait_read, wait_write
+
+    def gevent_wait_callback(connection, timeout=None):
+        while True:
+            state = connection.poll()
+            if state == extensions.POLL_OK:
+                break
+            elif state == extensions.POLL_READ:
+                wait_read(connection.fileno(), timeout=timeout)
+            elif state == extensions.POLL_WRITE:
+                wait_write(connection.fileno(), timeout=timeout)
+            else:
+                raise psycopg2.OperationalError(f"Résultat inattendu de poll : {state!r}")
+
+    extensions.set_wait_callback(gevent_wait_callback)
+
+
+def on_starting(server):
+    if workers > 1 and not shared_blocklist(os.environ):
+        server.log.warning("%d workers sans CACHE_REDIS_URL : une révocation de jeton JWT (déconnexion, "
+                           "compte modifié) ne vaut que pour le worker qui la reçoit", workers)
+
+    # Les fichiers d'un lancement précédent fausseraient les compteurs
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, '*.db')):
+        os.remove(path)
+
+
+def child_exit(server, worker):
+    # Retirer les jauges du worker terminé (requêtes en cours, connexions utilisées)
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    if worker_class in ('gevent', 'eventlet'):
+        make_psycopg2_green()
+        server.log.info("Worker %s : mode coopératif %s", worker.pid, worker_class)
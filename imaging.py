@@ -0,0 +1,112 @@
+"""Préparation locale des images avant l'envoi.
+
+Chaque image est redressée (orientation EXIF), réduite, débarrassée de ses
+métadonnées et réencodée (WebP par défaut, JPEG si le format demandé n'est
+pas disponible), puis déclinée en miniatures pour les écrans de liste.
+
+Pillow est optionnel : sans lui, le fichier original est envoyé tel quel et
+Cloudinary le redimensionne à distance.
+"""
+import io
+from collections import namedtuple
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+ProcessedImage = namedtuple('ProcessedImage', ['data', 'content_type', 'extension', 'width', 'height'])
+
+# Format demandé -> (format Pillow, type MIME, extension)
+FORMATS = {
+    'avif': ('AVIF', 'image/avif', 'avif'),
+    'webp': ('WEBP', 'image/webp', 'webp'),
+    'jpeg': ('JPEG', 'image/jpeg', 'jpg'),
+}
+
+
+def is_available():
+    """Pillow est installé"""
+    return Image is not None
+
+
+def output_format(preferred):
+    """Format d'encodage : celui demandé s'il est supporté, sinon JPEG"""
+    if preferred == 'webp' and features.check('webp'):
+        return preferred
+    if preferred == 'avif':
+        Image.init()
+        if 'AVIF' in Image.SAVE:
+            return preferred
+    return 'jpeg'
+
+
+def parse_sizes(spec):
+    """'small:320,medium:640' -> [('small', 320), ('medium', 640)]"""
+    sizes = []
+    for item in (spec or '').split(','):
+        if ':' in item:
+            name, width = item.split(':', 1)
+            sizes.append((name.strip(), int(width)))
+    return sizes
+
+
+def encode(image, fmt, quality):
+    """Réencoder sans métadonnées (EXIF, XMP, profils) dans le format fmt"""
+    pil_format, content_type, extension = FORMATS[fmt]
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        # Pas de transparence en JPEG : fond blanc
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background.paste(image, mask=image.getchannel('A'))
+        else:
+            background.paste(image.convert('RGB'))
+        image = background
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or image.mode == 'P' else 'RGB')
+
+    options = {'quality': quality}
+    if fmt == 'jpeg':
+        options.update(optimize=True, progressive=True)
+    elif fmt == 'webp':
+        options['method'] = 4
+
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return ProcessedImage(buffer.getvalue(), content_type, extension, image.width, image.height)
+
+
+def load(data):
+    """Décoder une image et appliquer son orientation EXIF"""
+    try:
+        image = Image.open(io.BytesIO(data))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    except Exception as error:
+        raise ValueError("Fichier non reconnu comme image") from error
+    image.info = {}  # Les métadonnées ne sont jamais recopiées
+    return image
+
+
+def process_image(data, max_width=1200, max_height=800, sizes=(), fmt='webp', quality=80):
+    """Préparer une image et ses miniatures.
+
+    Retourne (image principale, {nom: miniature}), ou None si Pillow n'est
+    pas installé. Lève ValueError si le fichier n'est pas une image.
+    """
+    if not is_available():
+        return None
+    fmt = output_format(fmt)
+    image = load(data)
+    image.thumbnail((max_width, max_height), Image.LANCZOS)
+    main = encode(image, fmt, quality)
+
+    variants = {}
+    for name, width in sizes:
+        if width >= image.width:
+            continue  # Jamais d'agrandissement : l'image principale suffit
+        variant = image.copy()
+        variant.thumbnail((width, image.height), Image.LANCZOS)
+        variants[name] = encode(variant, fmt, quality)
+    return main, variants
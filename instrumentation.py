@@ -0,0 +1,124 @@
+"""Mesures par requête (activées par INSTRUMENTATION_ENABLED).
+
+Pour chaque requête : nombre de requêtes SQL et temps passé en base, temps de
+rendu des templates et de sérialisation JSON. Les mesures sont renvoyées dans
+l'en-tête Server-Timing (visible dans les outils de développement du
+navigateur) et les requêtes plus lentes que SLOW_REQUEST_MS sont journalisées.
+
+Une fraction des requêtes (PROFILE_SAMPLE_RATE) est profilée avec cProfile ;
+le profil est enregistré dans PROFILE_DIR seulement si la requête est lente.
+"""
+import cProfile
+import functools
+import io
+import os
+import pstats
+import random
+import time
+from datetime import datetime
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def _add(name, value):
+    setattr(g, name, g.get(name, 0) + value)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and conn.info.get('query_start'):
+        _add('sql_count', 1)
+        _add('sql_time', time.perf_counter() - conn.info['query_start'].pop())
+
+
+def start_render(sender, template, context, **extra):
+    g.render_start = time.perf_counter()
+
+
+def end_render(sender, template, context, **extra):
+    if g.get('render_start') is not None:
+        _add('render_time', time.perf_counter() - g.render_start)
+        g.render_start = None
+
+
+def timed_serialization(function):
+    """Compter le temps passé dans function comme temps de sérialisation JSON
+    (sérialiseur de jsonify, corps de liste construits à la main)"""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not has_request_context() or g.get('request_start') is None:
+            return function(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _add('serialize_time', time.perf_counter() - start)
+    return wrapper
+
+
+def server_timing(total):
+    """Valeur de l'en-tête Server-Timing (durées en millisecondes)"""
+    metrics = [
+        f'db;dur={g.get("sql_time", 0) * 1000:.1f};desc="{g.get("sql_count", 0)} SQL"',
+        f'render;dur={g.get("render_time", 0) * 1000:.1f}',
+        f'serialize;dur={g.get("serialize_time", 0) * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}',
+    ]
+    return ', '.join(metrics)
+
+
+def init_instrumentation(app):
+    """Brancher les mesures sur l'application si INSTRUMENTATION_ENABLED"""
+    if not app.config.get('INSTRUMENTATION_ENABLED'):
+        return
+
+    event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', after_cursor_execute)
+    before_render_template.connect(start_render, app)
+    template_rendered.connect(end_render, app)
+    app.json.dumps = timed_serialization(app.json.dumps)
+
+    slow_ms = app.config['SLOW_REQUEST_MS']
+    sample_rate = app.config['PROFILE_SAMPLE_RATE']
+    profile_dir = app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+        if sample_rate and random.random() < sample_rate:
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @app.after_request
+    def record_request_timing(response):
+        start = g.get('request_start')
+        if start is None:
+            return response
+        total = time.perf_counter() - start
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+
+        response.headers['Server-Timing'] = server_timing(total)
+
+        if total * 1000 >= slow_ms:
+            app.logger.warning(
+                "Requête lente %s %s (%s) : %.0f ms, %d requêtes SQL (%.0f ms), rendu %.0f ms, JSON %.0f ms",
+                request.method, request.path, request.endpoint, total * 1000,
+                g.get('sql_count', 0), g.get('sql_time', 0) * 1000,
+                g.get('render_time', 0) * 1000, g.get('serialize_time', 0) * 1000
+            )
+            if profiler is not None:
+                os.makedirs(profile_dir, exist_ok=True)
+                filename = os.path.join(profile_dir, f"{datetime.now():%Y%m%d-%H%M%S}-{request.endpoint}-{os.getpid()}.prof")
+                profiler.dump_stats(filename)
+                summary = io.StringIO()
+                pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(15)
+                app.logger.warning("Profil enregistré dans %s\n%s", filename, summary.getvalue())
+        return response
@@ -0,0 +1,132 @@
+"""Téléversement des images en arrière-plan.
+
+Les fichiers sont lus pendant la requête puis envoyés par un pool de threads,
+pour que le formulaire admin réponde sans attendre Cloudinary.
+"""
+import hashlib
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+# Fichier lu en mémoire, détaché de la requête
+PendingFile = namedtuple('PendingFile', ['filename', 'data', 'content_type'])
+
+
+def read_pending_files(file_storages):
+    """Lire les fichiers d'un formulaire avant la fin de la requête"""
+    return [PendingFile(f.filename, f.read(), f.mimetype)
+            for f in file_storages if f and f.filename]
+
+
+class UploadQueue:
+    """Pool de threads pour les tâches d'upload.
+
+    Le pool est créé au premier usage, donc après le fork des workers
+    gunicorn. Avec max_workers=0 les tâches s'exécutent immédiatement
+    dans le thread appelant (tests, développement).
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        if not self.max_workers:
+            fn(*args, **kwargs)
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='upload')
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+def upload_with_retry(upload, pending, retries=2, backoff=0.5, sleep=time.sleep):
+    """Envoyer un fichier, en réessayant avec un délai doublé à chaque échec.
+
+    upload(data, filename) retourne un dictionnaire (url, public_id, ...).
+    ValueError (fichier invalide) n'est jamais réessayée.
+    """
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            result = upload(pending.data, pending.filename)
+            return {'filename': pending.filename, 'success': True, 'attempts': attempts, **result}
+        except Exception as upload_error:
+            if attempts > retries or isinstance(upload_error, ValueError):
+                return {'filename': pending.filename, 'success': False,
+                        'error': str(upload_error), 'attempts': attempts}
+            sleep(backoff * 2 ** (attempts - 1))
+
+
+def upload_batch(upload, files, max_concurrency=4, retries=2, backoff=0.5, sleep=time.sleep):
+    """Envoyer plusieurs fichiers en parallèle (au plus max_concurrency à la fois).
+
+    Retourne un résultat par fichier, dans l'ordre des fichiers.
+    """
+    if len(files) <= 1 or max_concurrency <= 1:
+        return [upload_with_retry(upload, pending, retries, backoff, sleep) for pending in files]
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(files)),
+                            thread_name_prefix='upload-batch') as executor:
+        return list(executor.map(
+            lambda pending: upload_with_retry(upload, pending, retries, backoff, sleep), files))
+
+
+class FakeUploader:
+    """Remplaçant de cloudinary.uploader (et du sous-ensemble utilisé de
+    cloudinary.api) pour les tests et le développement.
+
+    failures : nombre d'échecs à simuler par nom de fichier avant de réussir.
+    """
+
+    def __init__(self, latency=0, failures=None):
+        self.latency = latency
+        self.failures = dict(failures or {})
+        self.uploaded = {}
+        self.created_at = {}
+        self._lock = threading.Lock()
+
+    def upload(self, file, folder='', filename=None, public_id=None, **options):
+        time.sleep(self.latency)
+        data = file.read() if hasattr(file, 'read') else file
+        with self._lock:
+            if self.failures.get(filename):
+                self.failures[filename] -= 1
+                raise RuntimeError(f"Échec simulé pour {filename}")
+            public_id = f"{folder}/{public_id or hashlib.sha1(data).hexdigest()[:20]}".lstrip('/')
+            self.uploaded[public_id] = data
+            self.created_at.setdefault(public_id, datetime.now(timezone.utc))
+        return {'public_id': public_id, 'secure_url': f"https://fake.cloudinary/{public_id}",
+                'bytes': len(data)}
+
+    def destroy(self, public_id, **options):
+        with self._lock:
+            found = self.uploaded.pop(public_id, None) is not None
+            self.created_at.pop(public_id, None)
+        return {'result': 'ok' if found else 'not found'}
+
+    def resources(self, type='upload', prefix='', max_results=500, next_cursor=None, **options):
+        with self._lock:
+            keys = sorted(key for key in self.uploaded if key.startswith(prefix))
+        start = int(next_cursor or 0)
+        page = keys[start:start + max_results]
+        return {
+            'resources': [{'public_id': key, 'bytes': len(self.uploaded.get(key, b'')),
+                           'created_at': self.created_at[key].isoformat().replace('+00:00', 'Z')}
+                          for key in page if key in self.created_at],
+            'next_cursor': str(start + max_results) if start + max_results < len(keys) else None
+        }
+
+    def delete_resources(self, public_ids, **options):
+        return {'deleted': {public_id: 'deleted' if self.destroy(public_id)['result'] == 'ok' else 'not_found'
+                            for public_id in public_ids}}
@@ -0,0 +1,64 @@
+"""Ramasse-miettes des médias orphelins.
+
+Compare les fichiers du stockage avec les public_id encore référencés en
+base, puis supprime les orphelins par lots, avec une pause entre deux lots
+pour respecter les limites de l'API Cloudinary.
+
+Les fichiers récents (moins de min_age) sont ignorés : ils peuvent appartenir
+à un envoi en cours, pas encore rattaché à une opportunité. Les références
+sont relues juste avant chaque suppression, pour ne jamais supprimer un
+fichier rattaché entre-temps.
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+
+def collect_orphans(storage, referenced_ids, prefix, min_age=timedelta(days=1),
+                    batch_size=100, pause=1.0, dry_run=False, sleep=time.sleep):
+    """Supprimer les fichiers du stockage qui ne sont plus référencés.
+
+    referenced_ids(public_ids) retourne l'ensemble des public_id encore
+    utilisés parmi ceux donnés. Retourne un rapport (fichiers parcourus,
+    orphelins, supprimés, octets récupérés).
+    """
+    report = {'scanned': 0, 'recent': 0, 'orphans': 0, 'deleted': 0,
+              'reclaimed_bytes': 0, 'dry_run': dry_run}
+    cutoff = datetime.now(timezone.utc) - min_age
+    batch = {}
+
+    def flush():
+        candidates = list(batch)
+        still_used = referenced_ids(candidates)
+        orphans = [public_id for public_id in candidates if public_id not in still_used]
+        report['orphans'] += len(orphans)
+        if orphans and not dry_run:
+            deleted = storage.delete_many(orphans)
+            report['deleted'] += len(deleted)
+            report['reclaimed_bytes'] += sum(batch[public_id] for public_id in deleted)
+            if pause:
+                sleep(pause)
+        elif dry_run:
+            report['reclaimed_bytes'] += sum(batch[public_id] for public_id in orphans)
+        batch.clear()
+
+    for stored in storage.list_files(prefix):
+        report['scanned'] += 1
+        if stored['created_at'] > cutoff:
+            report['recent'] += 1
+            continue
+        batch[stored['public_id']] = stored['bytes']
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return report
+
+
+def release_files(storage, referenced_ids, public_ids):
+    """Supprimer tout de suite les fichiers donnés qui ne sont plus référencés
+    (le même fichier peut servir à plusieurs opportunités)"""
+    public_ids = [public_id for public_id in public_ids if public_id]
+    if not public_ids:
+        return []
+    still_used = referenced_ids(public_ids)
+    return storage.delete_many([public_id for public_id in public_ids if public_id not in still_used])
@@ -0,0 +1,163 @@
+"""Métriques Prometheus exposées sur /metrics.
+
+- http_request_duration_seconds : latence par endpoint, méthode et statut
+- http_requests_in_progress : requêtes en cours (saturation des workers)
+- db_pool_* : attente d'une connexion, connexions utilisées, timeouts
+- cache_lookups_total : accès aux caches par résultat (hit / miss)
+- media_upload_duration_seconds, media_upload_errors_total : envois vers le stockage
+
+Sous gunicorn, chaque worker écrit ses valeurs dans PROMETHEUS_MULTIPROC_DIR
+(préparé par gunicorn.conf.py) et /metrics agrège tous les workers, quel que
+soit celui qui répond. Sans prometheus_client, les mesures sont ignorées.
+
+Taux de hit d'un cache :
+    sum(rate(cache_lookups_total{result="hit"}[5m])) by (cache)
+      / sum(rate(cache_lookups_total[5m])) by (cache)
+"""
+import hmac
+import os
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, jsonify, request
+from sqlalchemy import event
+
+from dbpool import TimedQueuePool, pool_stats
+
+try:
+    import prometheus_client
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+except ImportError:
+    prometheus_client = None
+
+# Activé par init_metrics : sans lui, les fonctions d'enregistrement ne font rien
+enabled = False
+
+if prometheus_client is not None:
+    REQUEST_LATENCY = Histogram(
+        'http_request_duration_seconds', "Durée des requêtes HTTP",
+        ['endpoint', 'method', 'status'],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    )
+    REQUESTS_IN_PROGRESS = Gauge(
+        'http_requests_in_progress', "Requêtes HTTP en cours de traitement",
+        multiprocess_mode='livesum'
+    )
+    DB_POOL_WAIT = Histogram(
+        'db_pool_wait_seconds', "Attente d'une connexion du pool",
+        buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10)
+    )
+    DB_POOL_TIMEOUTS = Counter('db_pool_timeouts_total', "Attentes d'une connexion abandonnées (pool_timeout)")
+    DB_POOL_IN_USE = Gauge(
+        'db_pool_connections_in_use', "Connexions empruntées au pool",
+        multiprocess_mode='livesum'
+    )
+    DB_POOL_CONNECTS = Counter('db_pool_connects_total', "Nouvelles connexions à la base")
+    DB_POOL_INVALIDATIONS = Counter('db_pool_invalidations_total', "Connexions invalidées")
+    CACHE_LOOKUPS = Counter('cache_lookups_total', "Accès aux caches", ['cache', 'result'])
+    MEDIA_UPLOAD_DURATION = Histogram(
+        'media_upload_duration_seconds', "Durée d'un envoi vers le stockage des médias",
+        ['storage', 'result'],
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+    )
+    MEDIA_UPLOAD_ERRORS = Counter('media_upload_errors_total', "Envois en échec", ['storage', 'error'])
+
+
+def record_cache(cache, hit):
+    """Compter un accès au cache nommé"""
+    if enabled:
+        CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+@contextmanager
+def track_upload(storage):
+    """Mesurer un envoi vers le stockage (durée, erreurs par type d'exception)"""
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as upload_error:
+        MEDIA_UPLOAD_DURATION.labels(storage, 'error').observe(time.perf_counter() - start)
+        MEDIA_UPLOAD_ERRORS.labels(storage, type(upload_error).__name__).inc()
+        raise
+    MEDIA_UPLOAD_DURATION.labels(storage, 'success').observe(time.perf_counter() - start)
+
+
+def record_pool_wait(seconds, timed_out):
+    if timed_out:
+        DB_POOL_TIMEOUTS.inc()
+    else:
+        DB_POOL_WAIT.observe(seconds)
+
+
+def pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_IN_USE.inc()
+
+
+def pool_checkin(dbapi_connection, connection_record):
+    DB_POOL_IN_USE.dec()
+
+
+def pool_connect(dbapi_connection, connection_record):
+    DB_POOL_CONNECTS.inc()
+
+
+def pool_invalidate(dbapi_connection, connection_record, exception):
+    DB_POOL_INVALIDATIONS.inc()
+
+
+def collect_metrics():
+    """Métriques au format texte de Prometheus, agrégées sur tous les workers"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry)
+
+
+def init_metrics(app):
+    """Brancher les métriques et la route /metrics si METRICS_ENABLED"""
+    global enabled
+    if not app.config.get('METRICS_ENABLED'):
+        return
+    if prometheus_client is None:
+        app.logger.warning("prometheus_client non installé, /metrics est désactivé")
+        return
+    enabled = True
+
+    pool_stats.add_observer(record_pool_wait)
+    event.listen(TimedQueuePool, 'checkout', pool_checkout)
+    event.listen(TimedQueuePool, 'checkin', pool_checkin)
+    event.listen(TimedQueuePool, 'connect', pool_connect)
+    event.listen(TimedQueuePool, 'invalidate', pool_invalidate)
+
+    @app.before_request
+    def start_metrics_timer():
+        g.metrics_start = time.perf_counter()
+        REQUESTS_IN_PROGRESS.inc()
+
+    @app.after_request
+    def record_request_latency(response):
+        start = g.get('metrics_start')
+        if start is not None and request.endpoint != 'metrics':
+            # Endpoint plutôt que chemin : une seule série par route, quels que soient ses paramètres
+            REQUEST_LATENCY.labels(request.endpoint or 'none', request.method,
+                                   str(response.status_code)).observe(time.perf_counter() - start)
+        return response
+
+    @app.teardown_request
+    def end_metrics_timer(exception=None):
+        if g.pop('metrics_start', None) is not None:
+            REQUESTS_IN_PROGRESS.dec()
+
+    def metrics():
+        """Métriques Prometheus (Authorization: Bearer METRICS_TOKEN si défini)"""
+        token = app.config.get('METRICS_TOKEN')
+        if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return jsonify({'error': 'Non autorisé'}), 401
+        return Response(collect_metrics(), mimetype=CONTENT_TYPE_LATEST)
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
@@ -0,0 +1,367 @@
+"""Migrations de schéma versionnées et réversibles.
+
+Chaque migration a un numéro de version, une fonction upgrade et une fonction
+downgrade qui reçoivent une connexion SQLAlchemy. Les versions appliquées sont
+enregistrées dans la table schema_migrations.
+"""
+from collections import namedtuple
+
+from sqlalchemy import (Column, ForeignKey, Index, Integer, MetaData, String, Table, Text,
+                        inspect, select, text, update)
+
+from search import drop_search_index, setup_search_index
+from serializers import store_summaries
+
+Migration = namedtuple('Migration', ['version', 'description', 'upgrade', 'downgrade'])
+
+# Index des colonnes filtrées et triées par les routes (nom, table, colonnes)
+HOT_INDEXES = [
+    ('ix_opportunity_created_at', 'opportunity', 'created_at DESC, id DESC'),
+    ('ix_opportunity_type_created_at', 'opportunity', 'type, created_at DESC, id DESC'),
+    ('ix_opportunity_featured_created_at', 'opportunity', 'is_featured, created_at DESC'),
+    ('ix_opportunity_deadline', 'opportunity', 'deadline'),
+    ('ix_user_is_active', '"user"', 'is_active'),
+]
+
+
+def create_hot_indexes(connection):
+    for name, table, columns in HOT_INDEXES:
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+def drop_hot_indexes(connection):
+    for name, *_ in HOT_INDEXES:
+        connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+# Tables filles de la migration 0003, figées ici pour ne pas dépendre des modèles
+child_metadata = MetaData()
+
+opportunity_table = Table(
+    'opportunity', child_metadata,
+    Column('id', Integer, primary_key=True),
+    Column('postulation_steps', Text),
+    Column('documents_required', Text),
+    Column('image_urls', Text),
+    Column('image_public_ids', Text),
+)
+
+step_table = Table(
+    'opportunity_step', child_metadata,
+    Column('id', Integer, primary_key=True),
+    Column('opportunity_id', Integer, ForeignKey('opportunity.id', ondelete='CASCADE'), nullable=False),
+    Column('position', Integer, nullable=False),
+    Column('content', Text, nullable=False),
+    Index('ix_opportunity_step_opportunity_position', 'opportunity_id', 'position'),
+)
+
+document_table = Table(
+    'opportunity_document', child_metadata,
+    Column('id', Integer, primary_key=True),
+    Column('opportunity_id', Integer, ForeignKey('opportunity.id', ondelete='CASCADE'), nullable=False),
+    Column('position', Integer, nullable=False),
+    Column('content', Text, nullable=False),
+    Index('ix_opportunity_document_opportunity_position', 'opportunity_id', 'position'),
+)
+
+image_table = Table(
+    'opportunity_image', child_metadata,
+    Column('id', Integer, primary_key=True),
+    Column('opportunity_id', Integer, ForeignKey('opportunity.id', ondelete='CASCADE'), nullable=False),
+    Column('position', Integer, nullable=False),
+    Column('url', String(500), nullable=False),
+    Column('public_id', String(255)),
+    Index('ix_opportunity_image_opportunity_position', 'opportunity_id', 'position'),
+)
+
+CHILD_TABLES = [step_table, document_table, image_table]
+BATCH_SIZE = 500
+
+
+def split_joined(value):
+    """Découper une ancienne colonne '|||' en éléments non vides"""
+    return [item.strip() for item in (value or '').split('|||') if item.strip()]
+
+
+def batched_rows(connection, columns):
+    """Parcourir la table opportunity par lots, dans l'ordre des id"""
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            select(opportunity_table.c.id, *columns)
+            .where(opportunity_table.c.id > last_id)
+            .order_by(opportunity_table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def normalize_joined_columns(connection):
+    for table in CHILD_TABLES:
+        table.create(connection, checkfirst=True)
+
+    c = opportunity_table.c
+    for rows in batched_rows(connection, [c.postulation_steps, c.documents_required,
+                                          c.image_urls, c.image_public_ids]):
+        steps, documents, images = [], [], []
+        for row in rows:
+            steps += [{'opportunity_id': row.id, 'position': i, 'content': step}
+                      for i, step in enumerate(split_joined(row.postulation_steps))]
+            documents += [{'opportunity_id': row.id, 'position': i, 'content': doc}
+                          for i, doc in enumerate(split_joined(row.documents_required))]
+            public_ids = split_joined(row.image_public_ids)
+            images += [{'opportunity_id': row.id, 'position': i, 'url': url,
+                        'public_id': public_ids[i] if i < len(public_ids) else None}
+                       for i, url in enumerate(split_joined(row.image_urls))]
+
+        for table, values in ((step_table, steps), (document_table, documents), (image_table, images)):
+            if values:
+                connection.execute(table.insert(), values)
+
+
+def denormalize_joined_columns(connection):
+    """Réécrire les tables filles dans les anciennes colonnes '|||' puis les supprimer"""
+    for rows in batched_rows(connection, []):
+        ids = [row.id for row in rows]
+        joined = {opportunity_id: {} for opportunity_id in ids}
+        for table, columns in ((step_table, {'postulation_steps': 'content'}),
+                               (document_table, {'documents_required': 'content'}),
+                               (image_table, {'image_urls': 'url', 'image_public_ids': 'public_id'})):
+            children = connection.execute(
+                select(table).where(table.c.opportunity_id.in_(ids))
+                .order_by(table.c.opportunity_id, table.c.position)
+            ).all()
+            grouped = {}
+            for child in children:
+                grouped.setdefault(child.opportunity_id, []).append(child)
+            for target, source in columns.items():
+                for opportunity_id in ids:
+                    joined[opportunity_id][target] = '|||'.join(
+                        getattr(child, source) or '' for child in grouped.get(opportunity_id, [])
+                    )
+        for opportunity_id, values in joined.items():
+            connection.execute(update(opportunity_table)
+                               .where(opportunity_table.c.id == opportunity_id).values(**values))
+
+    for table in reversed(CHILD_TABLES):
+        table.drop(connection, checkfirst=True)
+
+
+def create_catalogue_state(connection):
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS catalogue_state (
+            id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    if not connection.execute(text("SELECT 1 FROM catalogue_state WHERE id = 1")).first():
+        connection.execute(text("INSERT INTO catalogue_state (id, version, updated_at) "
+                                "VALUES (1, 0, CURRENT_TIMESTAMP)"))
+
+
+def drop_catalogue_state(connection):
+    connection.execute(text("DROP TABLE IF EXISTS catalogue_state"))
+
+
+def has_column(connection, table, column):
+    """Colonne déjà présente (bases neuves créées par create_all)"""
+    return column in {c['name'] for c in inspect(connection).get_columns(table)}
+
+
+def add_sync_columns(connection):
+    if not has_column(connection, 'opportunity', 'updated_at'):
+        # Sans valeur par défaut calculée : SQLite ne l'accepte pas dans ALTER TABLE
+        connection.execute(text("ALTER TABLE opportunity ADD COLUMN updated_at TIMESTAMP"))
+        connection.execute(text("UPDATE opportunity SET updated_at = created_at"))
+    if not has_column(connection, 'opportunity', 'revision'):
+        connection.execute(text("ALTER TABLE opportunity ADD COLUMN revision INTEGER NOT NULL DEFAULT 0"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_opportunity_revision ON opportunity (revision)"))
+    # INTEGER PRIMARY KEY n'est auto-incrémenté que sous SQLite
+    id_type = 'SERIAL' if connection.dialect.name == 'postgresql' else 'INTEGER'
+    connection.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS opportunity_tombstone (
+            id {id_type} PRIMARY KEY,
+            opportunity_id INTEGER NOT NULL,
+            revision INTEGER NOT NULL,
+            deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_opportunity_tombstone_revision "
+                            "ON opportunity_tombstone (revision)"))
+
+
+def drop_sync_columns(connection):
+    connection.execute(text("DROP TABLE IF EXISTS opportunity_tombstone"))
+    connection.execute(text("DROP INDEX IF EXISTS ix_opportunity_revision"))
+    connection.execute(text("ALTER TABLE opportunity DROP COLUMN revision"))
+    connection.execute(text("ALTER TABLE opportunity DROP COLUMN updated_at"))
+
+
+DEFAULT_CATEGORIES = [
+    {'id': 'bourse', 'name': 'Bourses', 'icon': 'school', 'description': "Bourses d'études", 'position': 0},
+    {'id': 'excellence', 'name': 'Excellence', 'icon': 'star', 'description': "Programmes d'excellence", 'position': 1},
+    {'id': 'admission', 'name': 'Admissions', 'icon': 'book-open', 'description': 'Admissions universitaires', 'position': 2},
+]
+
+
+def create_categories(connection):
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS category (
+            id VARCHAR(50) PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            icon VARCHAR(50),
+            description VARCHAR(200),
+            position INTEGER NOT NULL DEFAULT 0
+        )
+    """))
+    if not connection.execute(text("SELECT 1 FROM category")).first():
+        connection.execute(text("INSERT INTO category (id, name, icon, description, position) "
+                                "VALUES (:id, :name, :icon, :description, :position)"), DEFAULT_CATEGORIES)
+
+
+def drop_categories(connection):
+    connection.execute(text("DROP TABLE IF EXISTS category"))
+
+
+def add_media_status(connection):
+    if not has_column(connection, 'opportunity', 'media_status'):
+        connection.execute(text("ALTER TABLE opportunity ADD COLUMN media_status VARCHAR(20) "
+                                "NOT NULL DEFAULT 'ready'"))
+
+
+def drop_media_status(connection):
+    connection.execute(text("ALTER TABLE opportunity DROP COLUMN media_status"))
+
+
+# Table de la migration 0008, figée comme celles de la migration 0003
+variant_table = Table(
+    'opportunity_image_variant', child_metadata,
+    Column('id', Integer, primary_key=True),
+    Column('image_id', Integer, ForeignKey('opportunity_image.id', ondelete='CASCADE'), nullable=False),
+    Column('name', String(20), nullable=False),
+    Column('url', String(500), nullable=False),
+    Column('public_id', String(255)),
+    Column('width', Integer),
+    Column('height', Integer),
+    Index('ix_opportunity_image_variant_image_id', 'image_id'),
+)
+
+
+def add_image_variants(connection):
+    for column in ('width', 'height'):
+        if not has_column(connection, 'opportunity_image', column):
+            connection.execute(text(f"ALTER TABLE opportunity_image ADD COLUMN {column} INTEGER"))
+    variant_table.create(connection, checkfirst=True)
+
+
+def drop_image_variants(connection):
+    variant_table.drop(connection, checkfirst=True)
+    connection.execute(text("ALTER TABLE opportunity_image DROP COLUMN height"))
+    connection.execute(text("ALTER TABLE opportunity_image DROP COLUMN width"))
+
+
+def add_summary_json(connection):
+    if not has_column(connection, 'opportunity', 'summary_json'):
+        connection.execute(text("ALTER TABLE opportunity ADD COLUMN summary_json TEXT"))
+    store_summaries(connection)
+
+
+def drop_summary_json(connection):
+    connection.execute(text("ALTER TABLE opportunity DROP COLUMN summary_json"))
+
+
+MIGRATIONS = [
+    Migration('0001', "Index de recherche plein texte", setup_search_index, drop_search_index),
+    Migration('0002', "Index des colonnes filtrées et triées", create_hot_indexes, drop_hot_indexes),
+    Migration('0003', "Étapes, documents et images en tables filles",
+              normalize_joined_columns, denormalize_joined_columns),
+    Migration('0004', "Révision du catalogue pour les ETag", create_catalogue_state, drop_catalogue_state),
+    Migration('0005', "Synchronisation incrémentale (updated_at, révision, suppressions)",
+              add_sync_columns, drop_sync_columns),
+    Migration('0006', "Registre des catégories", create_categories, drop_categories),
+    Migration('0007', "État des images envoyées en arrière-plan", add_media_status, drop_media_status),
+    Migration('0008', "Miniatures des images", add_image_variants, drop_image_variants),
+    Migration('0009', "Résumés JSON précalculés des opportunités", add_summary_json, drop_summary_json),
+]
+
+
+def ensure_migrations_table(connection):
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(20) PRIMARY KEY,
+            description VARCHAR(200),
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+
+
+def applied_versions(engine):
+    """Versions déjà appliquées sur la base"""
+    with engine.begin() as connection:
+        ensure_migrations_table(connection)
+        return {row[0] for row in connection.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def pending_migrations(engine):
+    applied = applied_versions(engine)
+    return [m for m in MIGRATIONS if m.version not in applied]
+
+
+def upgrade(engine, target=None):
+    """Appliquer les migrations en attente jusqu'à target (incluse).
+
+    Chaque migration s'exécute dans sa propre transaction.
+    Retourne la liste des migrations appliquées.
+    """
+    applied = []
+    for migration in pending_migrations(engine):
+        if target and migration.version > target:
+            break
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            connection.execute(
+                text("INSERT INTO schema_migrations (version, description) VALUES (:version, :description)"),
+                {'version': migration.version, 'description': migration.description}
+            )
+        applied.append(migration)
+    return applied
+
+
+def downgrade(engine, target):
+    """Annuler les migrations de version supérieure à target ('0000' pour tout annuler).
+
+    Retourne la liste des migrations annulées.
+    """
+    applied = applied_versions(engine)
+    reverted = []
+    for migration in reversed(MIGRATIONS):
+        if migration.version <= target or migration.version not in applied:
+            continue
+        with engine.begin() as connection:
+            migration.downgrade(connection)
+            connection.execute(text("DELETE FROM schema_migrations WHERE version = :version"),
+                               {'version': migration.version})
+        reverted.append(migration)
+    return reverted
+
+
+def missing_indexes(engine, metadata):
+    """Comparer les index déclarés sur les modèles au schéma réel.
+
+    Retourne une liste de (table, index) absents de la base.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                missing.append((table.name, index.name))
+    return missing
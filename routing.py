@@ -0,0 +1,20 @@
+"""Routage des lectures vers un réplica PostgreSQL.
+
+Les vues marquées par read_replica lisent sur le bind 'replica' (configuré par
+DATABASE_REPLICA_URL). Les écritures, les flushs et tout le reste restent sur
+la base principale.
+"""
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(Session):
+    """Session qui envoie les lectures des vues marquées vers le réplica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_request_context()
+                and g.get('use_replica') and REPLICA_BIND in self._db.engines):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,189 @@
+"""Recherche plein texte sur les opportunités.
+
+PostgreSQL : index GIN sur un tsvector (configuration française sans accents).
+SQLite : table virtuelle FTS5 synchronisée par triggers.
+"""
+import html
+import re
+
+from sqlalchemy import text
+
+# Marqueurs de surlignage, remplacés par <mark> après échappement HTML
+START_MARK = '\x02'
+STOP_MARK = '\x03'
+
+PG_CONFIG = 'fr_unaccent'
+
+# Document indexé : le titre pèse plus que la description, puis pays et type.
+# L'expression doit rester identique à celle de l'index GIN pour qu'il soit utilisé.
+PG_DOCUMENT = (
+    "setweight(to_tsvector('fr_unaccent', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('fr_unaccent', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('fr_unaccent', coalesce(pays, '')), 'C') || "
+    "setweight(to_tsvector('fr_unaccent', coalesce(type, '')), 'C')"
+)
+
+PG_SETUP = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'fr_unaccent') THEN
+            CREATE TEXT SEARCH CONFIGURATION fr_unaccent (COPY = french);
+            ALTER TEXT SEARCH CONFIGURATION fr_unaccent
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+        END IF;
+    END
+    $$
+    """,
+    f"CREATE INDEX IF NOT EXISTS ix_opportunity_search ON opportunity USING GIN (({PG_DOCUMENT}))",
+]
+
+PG_TEARDOWN = [
+    "DROP INDEX IF EXISTS ix_opportunity_search",
+    "DROP TEXT SEARCH CONFIGURATION IF EXISTS fr_unaccent",
+]
+
+SQLITE_SETUP = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS opportunity_fts USING fts5(
+        title, description, pays, type,
+        content='opportunity', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS opportunity_fts_ai AFTER INSERT ON opportunity BEGIN
+        INSERT INTO opportunity_fts(rowid, title, description, pays, type)
+        VALUES (new.id, new.title, new.description, new.pays, new.type);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS opportunity_fts_ad AFTER DELETE ON opportunity BEGIN
+        INSERT INTO opportunity_fts(opportunity_fts, rowid, title, description, pays, type)
+        VALUES ('delete', old.id, old.title, old.description, old.pays, old.type);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS opportunity_fts_au AFTER UPDATE ON opportunity BEGIN
+        INSERT INTO opportunity_fts(opportunity_fts, rowid, title, description, pays, type)
+        VALUES ('delete', old.id, old.title, old.description, old.pays, old.type);
+        INSERT INTO opportunity_fts(rowid, title, description, pays, type)
+        VALUES (new.id, new.title, new.description, new.pays, new.type);
+    END
+    """,
+    "INSERT INTO opportunity_fts(opportunity_fts) VALUES ('rebuild')",
+]
+
+SQLITE_TEARDOWN = [
+    "DROP TRIGGER IF EXISTS opportunity_fts_ai",
+    "DROP TRIGGER IF EXISTS opportunity_fts_ad",
+    "DROP TRIGGER IF EXISTS opportunity_fts_au",
+    "DROP TABLE IF EXISTS opportunity_fts",
+]
+
+RESULT_COLUMNS = "o.id, o.title, o.type, o.pays, o.montant, o.is_featured, o.deadline"
+
+
+def setup_search_index(connection):
+    """Créer l'index de recherche adapté au moteur de base de données"""
+    if connection.dialect.name == 'sqlite' and connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE name = 'opportunity_fts'")).first():
+        return  # Déjà indexé, les triggers maintiennent l'index à jour
+    statements = {'postgresql': PG_SETUP, 'sqlite': SQLITE_SETUP}.get(connection.dialect.name, [])
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+def drop_search_index(connection):
+    """Supprimer l'index de recherche"""
+    statements = {'postgresql': PG_TEARDOWN, 'sqlite': SQLITE_TEARDOWN}.get(connection.dialect.name, [])
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+def highlight(value):
+    """Échapper le texte et convertir les marqueurs en <mark>"""
+    if not value:
+        return value
+    escaped = html.escape(value)
+    return escaped.replace(START_MARK, '<mark>').replace(STOP_MARK, '</mark>')
+
+
+def fts5_query(terms):
+    """Requête FTS5 : tous les termes, en préfixe (bourse -> bourses)"""
+    return ' '.join('"%s"*' % term.replace('"', '') for term in terms)
+
+
+def search_opportunities(session, query, page=1, per_page=20, type=None):
+    """Rechercher les opportunités, triées par pertinence.
+
+    Retourne un dictionnaire avec les résultats de la page demandée
+    (titre et extrait surlignés) et le nombre total de correspondances.
+    """
+    terms = re.findall(r'\w+', query.lower())
+    offset = (page - 1) * per_page
+    params = {'limit': per_page + 1, 'offset': offset, 'type': type}
+    type_filter = "AND o.type = :type" if type else ""
+    dialect = session.get_bind().dialect.name
+
+    if not terms:
+        rows, total = [], 0
+    elif dialect == 'postgresql':
+        params['q'] = ' '.join(terms)
+        params['options'] = f'StartSel="{START_MARK}", StopSel="{STOP_MARK}", MaxWords=35, MinWords=15'
+        base = f"""
+            FROM opportunity o, websearch_to_tsquery('{PG_CONFIG}', :q) query
+            WHERE ({PG_DOCUMENT}) @@ query {type_filter}
+        """
+        rows = session.execute(text(f"""
+            SELECT {RESULT_COLUMNS},
+                   ts_rank_cd({PG_DOCUMENT}, query) AS rank,
+                   ts_headline('{PG_CONFIG}', o.title, query, 'HighlightAll=true, ' || :options) AS title_hl,
+                   ts_headline('{PG_CONFIG}', o.description, query, :options) AS snippet
+            {base}
+            ORDER BY rank DESC, o.created_at DESC
+            LIMIT :limit OFFSET :offset
+        """), params).mappings().all()
+        total = session.execute(text(f"SELECT count(*) {base}"), params).scalar()
+    elif dialect == 'sqlite':
+        params['q'] = fts5_query(terms)
+        params['start'], params['stop'] = START_MARK, STOP_MARK
+        base = f"""
+            FROM opportunity_fts JOIN opportunity o ON o.id = opportunity_fts.rowid
+            WHERE opportunity_fts MATCH :q {type_filter}
+        """
+        # bm25 : plus petit = plus pertinent, poids par colonne (titre, description, pays, type)
+        rows = session.execute(text(f"""
+            SELECT {RESULT_COLUMNS},
+                   -bm25(opportunity_fts, 10.0, 3.0, 2.0, 2.0) AS rank,
+                   highlight(opportunity_fts, 0, :start, :stop) AS title_hl,
+                   snippet(opportunity_fts, 1, :start, :stop, '…', 24) AS snippet
+            {base}
+            ORDER BY rank DESC, o.created_at DESC
+            LIMIT :limit OFFSET :offset
+        """), params).mappings().all()
+        total = session.execute(text(f"SELECT count(*) {base}"), params).scalar()
+    else:
+        raise RuntimeError(f"Recherche plein texte non supportée pour {dialect}")
+
+    return {
+        'results': [{
+            'id': row['id'],
+            'title': row['title'],
+            'type': row['type'],
+            'pays': row['pays'],
+            'montant': row['montant'],
+            'is_featured': bool(row['is_featured']),
+            'deadline': str(row['deadline']) if row['deadline'] else None,
+            'rank': round(float(row['rank']), 6),
+            'highlight': {
+                'title': highlight(row['title_hl']),
+                'description': highlight(row['snippet'])
+            }
+        } for row in rows[:per_page]],
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'has_more': len(rows) > per_page
+    }
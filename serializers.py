@@ -0,0 +1,136 @@
+"""Sérialisation JSON des réponses de l'API.
+
+- OrjsonProvider : fournisseur JSON de Flask basé sur orjson (optionnel, repli
+  sur le module json standard), utilisé par jsonify et par le cache.
+- Résumés précalculés : la représentation liste de chaque opportunité est
+  sérialisée une fois, à l'écriture, dans opportunity.summary_json. Les listes
+  de l'API ne font ensuite que concaténer ces fragments.
+"""
+import json
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import (Boolean, Column, Date, DateTime, Integer, MetaData, String, Table, Text,
+                        and_, bindparam, select, update)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SUMMARY_DESCRIPTION_LENGTH = 200
+
+
+def dumps(obj):
+    """Sérialiser en JSON compact, clés triées (comme jsonify)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS).decode()
+    return json.dumps(obj, separators=(',', ':'), sort_keys=True, ensure_ascii=False)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """jsonify via orjson, en gardant le comportement de Flask pour les types
+    particuliers (dates au format HTTP, Decimal, UUID, dataclasses)"""
+
+    def dumps(self, obj, **kwargs):
+        # response() (jsonify) passe toujours separators compacts : c'est déjà la sortie d'orjson
+        if kwargs.get('separators') == (',', ':'):
+            del kwargs['separators']
+        if orjson is None or kwargs or (self.compact is False):
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+
+def truncate(description, length=SUMMARY_DESCRIPTION_LENGTH):
+    return description[:length] + '...' if len(description) > length else description
+
+
+def summary_payload(opportunity, cover_url=None, thumbnail=None):
+    """Représentation liste d'une opportunité (objet ou ligne avec les mêmes attributs)"""
+    return {
+        'id': opportunity.id,
+        'title': opportunity.title,
+        'type': opportunity.type,
+        'description': truncate(opportunity.description),
+        'pays': opportunity.pays,
+        'montant': opportunity.montant,
+        'is_featured': bool(opportunity.is_featured),
+        'image_urls': cover_url,
+        'thumbnail_url': thumbnail or cover_url,
+        'deadline': opportunity.deadline.isoformat() if opportunity.deadline else None,
+        'created_at': opportunity.created_at.isoformat() if opportunity.created_at else None
+    }
+
+
+def join_summaries(fragments):
+    """Tableau JSON à partir de fragments déjà sérialisés"""
+    return '[' + ','.join(fragments) + ']'
+
+
+def extend_summary(fragment, **fields):
+    """Ajouter des champs à un objet JSON déjà sérialisé"""
+    extra = dumps(fields)[1:-1]
+    return fragment[:-1] + ',' + extra + '}' if extra else fragment
+
+
+# Colonnes lues pour construire les résumés, figées pour la migration 0009
+summary_metadata = MetaData()
+
+opportunity_table = Table(
+    'opportunity', summary_metadata,
+    Column('id', Integer, primary_key=True),
+    Column('title', String(200)),
+    Column('type', String(50)),
+    Column('description', Text),
+    Column('pays', String(100)),
+    Column('montant', String(100)),
+    Column('deadline', Date),
+    Column('is_featured', Boolean),
+    Column('created_at', DateTime),
+    Column('summary_json', Text),
+)
+
+image_table = Table(
+    'opportunity_image', summary_metadata,
+    Column('id', Integer, primary_key=True),
+    Column('opportunity_id', Integer),
+    Column('position', Integer),
+    Column('url', String(500)),
+)
+
+variant_table = Table(
+    'opportunity_image_variant', summary_metadata,
+    Column('id', Integer, primary_key=True),
+    Column('image_id', Integer),
+    Column('name', String(20)),
+    Column('url', String(500)),
+)
+
+
+def store_summaries(connection, ids=None, batch_size=500):
+    """Recalculer summary_json des opportunités données (toutes si ids est None)"""
+    ids = sorted(ids) if ids is not None else [
+        row.id for row in connection.execute(select(opportunity_table.c.id))]
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        covers = {row.opportunity_id: row for row in connection.execute(
+            select(image_table.c.opportunity_id, image_table.c.url, variant_table.c.url.label('thumbnail'))
+            .select_from(image_table.outerjoin(variant_table, and_(
+                variant_table.c.image_id == image_table.c.id, variant_table.c.name == 'small')))
+            .where(image_table.c.opportunity_id.in_(batch), image_table.c.position == 0)
+        )}
+        rows = connection.execute(select(opportunity_table).where(opportunity_table.c.id.in_(batch))).all()
+        values = []
+        for row in rows:
+            cover = covers.get(row.id)
+            payload = summary_payload(row, cover.url if cover else None, cover.thumbnail if cover else None)
+            values.append({'row_id': row.id, 'summary_json': dumps(payload)})
+        if values:
+            connection.execute(
+                update(opportunity_table)
+                .where(opportunity_table.c.id == bindparam('row_id'))
+                .values(summary_json=bindparam('summary_json')),
+                values
+            )
@@ -0,0 +1,202 @@
+"""Stockage des fichiers média.
+
+Backends interchangeables (MEDIA_STORAGE) :
+- CloudinaryStorage : Cloudinary (ou FakeUploader hors ligne)
+- LocalStorage : disque local, servi par la route /media
+- MemoryStorage : en mémoire, servi par la route /media (tests, tests de charge)
+
+Chaque backend sait aussi lister ses fichiers (list_files) et en supprimer
+plusieurs à la fois (delete_many), pour le ramasse-miettes des médias.
+
+Les fichiers sont adressés par leur contenu (empreinte SHA-256) : un fichier
+identique n'est stocké qu'une fois et son URL ne change jamais, ce qui permet
+de le servir avec un cache immuable.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from datetime import datetime, timezone
+
+# Absents des tables mimetypes de certaines versions de Python
+mimetypes.add_type('image/webp', '.webp')
+mimetypes.add_type('image/avif', '.avif')
+
+# Clés acceptées par read() : dossiers et nom de fichier, sans remontée de dossier
+KEY_PATTERN = re.compile(r'^[\w-]+(/[\w-]+)*(\.\w+)?$')
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def content_key(data, folder, extension=None):
+    """Clé adressée par le contenu : dossier/empreinte.extension"""
+    key = f"{folder.strip('/')}/{content_hash(data)[:32]}"
+    return f"{key}.{extension}" if extension else key
+
+
+def content_type(key):
+    return mimetypes.guess_type(key)[0] or 'application/octet-stream'
+
+
+def extension_of(filename):
+    ext = os.path.splitext(filename or '')[1].lstrip('.').lower()
+    return ext if re.fullmatch(r'\w{1,5}', ext) else None
+
+
+class CloudinaryStorage:
+    """Stockage Cloudinary.
+
+    get_uploader et get_api retournent cloudinary.uploader et cloudinary.api
+    (ou un remplaçant hors ligne).
+    """
+
+    # Limite de l'API d'administration Cloudinary par appel
+    DELETE_BATCH = 100
+
+    def __init__(self, get_uploader, get_api):
+        self.get_uploader = get_uploader
+        self.get_api = get_api
+
+    def save(self, data, folder, filename=None, **options):
+        # public_id dérivé du contenu : un fichier déjà présent n'est pas stocké de nouveau
+        upload_result = self.get_uploader().upload(
+            data, folder=folder, filename=filename,
+            public_id=content_hash(data)[:32], overwrite=False, **options
+        )
+        return {'url': upload_result['secure_url'], 'public_id': upload_result['public_id'],
+                'bytes': upload_result.get('bytes', len(data))}
+
+    def delete(self, public_id):
+        return self.get_uploader().destroy(public_id).get('result') == 'ok'
+
+    def delete_many(self, public_ids):
+        deleted = []
+        for start in range(0, len(public_ids), self.DELETE_BATCH):
+            result = self.get_api().delete_resources(public_ids[start:start + self.DELETE_BATCH])
+            deleted += [public_id for public_id, status in result.get('deleted', {}).items()
+                        if status == 'deleted']
+        return deleted
+
+    def list_files(self, prefix):
+        next_cursor = None
+        while True:
+            page = self.get_api().resources(type='upload', prefix=prefix, max_results=500,
+                                            next_cursor=next_cursor)
+            for resource in page.get('resources', []):
+                yield {'public_id': resource['public_id'], 'bytes': resource.get('bytes', 0),
+                       'created_at': datetime.fromisoformat(resource['created_at'].replace('Z', '+00:00'))}
+            next_cursor = page.get('next_cursor')
+            if not next_cursor:
+                return
+
+    def read(self, key):
+        return None  # Servi par le CDN Cloudinary
+
+
+class LocalStorage:
+    """Stockage sur disque, adressé par le contenu"""
+
+    def __init__(self, root, base_url='/media'):
+        self.root = root
+        self.base_url = base_url.rstrip('/')
+
+    def path(self, key):
+        if not KEY_PATTERN.match(key):
+            return None
+        return os.path.join(self.root, *key.split('/'))
+
+    def save(self, data, folder, filename=None, **options):
+        key = content_key(data, folder, extension_of(filename))
+        path = self.path(key)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Écriture atomique : un lecteur ne voit jamais un fichier partiel
+            temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporary, 'wb') as f:
+                f.write(data)
+            os.replace(temporary, path)
+        return {'url': f"{self.base_url}/{key}", 'public_id': key, 'bytes': len(data)}
+
+    def delete(self, public_id):
+        path = self.path(public_id)
+        if path is None or not os.path.exists(path):
+            return False
+        os.remove(path)
+        return True
+
+    def delete_many(self, public_ids):
+        return [public_id for public_id in public_ids if self.delete(public_id)]
+
+    def list_files(self, prefix):
+        directory = self.path(prefix.strip('/'))
+        if directory is None or not os.path.isdir(directory):
+            return
+        for dirpath, _, filenames in os.walk(directory):
+            for filename in filenames:
+                if filename.endswith('.tmp'):
+                    continue  # Écriture en cours
+                path = os.path.join(dirpath, filename)
+                stat = os.stat(path)
+                yield {'public_id': os.path.relpath(path, self.root).replace(os.sep, '/'),
+                       'bytes': stat.st_size,
+                       'created_at': datetime.fromtimestamp(stat.st_mtime, timezone.utc)}
+
+    def read(self, key):
+        path = self.path(key)
+        if path is None or not os.path.isfile(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+
+class MemoryStorage:
+    """Stockage en mémoire, adressé par le contenu"""
+
+    def __init__(self, base_url='/media'):
+        self.base_url = base_url.rstrip('/')
+        self.files = {}
+        self.created_at = {}
+        self._lock = threading.Lock()
+
+    def save(self, data, folder, filename=None, **options):
+        key = content_key(data, folder, extension_of(filename))
+        with self._lock:
+            if key not in self.files:
+                self.files[key] = data
+                self.created_at[key] = datetime.now(timezone.utc)
+        return {'url': f"{self.base_url}/{key}", 'public_id': key, 'bytes': len(data)}
+
+    def delete(self, public_id):
+        with self._lock:
+            self.created_at.pop(public_id, None)
+            return self.files.pop(public_id, None) is not None
+
+    def delete_many(self, public_ids):
+        return [public_id for public_id in public_ids if self.delete(public_id)]
+
+    def list_files(self, prefix):
+        with self._lock:
+            files = [(key, len(data), self.created_at[key]) for key, data in self.files.items()
+                     if key.startswith(prefix)]
+        for key, size, created_at in files:
+            yield {'public_id': key, 'bytes': size, 'created_at': created_at}
+
+    def read(self, key):
+        return self.files.get(key)
+
+
+def create_storage(config, get_uploader, get_api, default_root):
+    """Construire le stockage choisi par MEDIA_STORAGE (cloudinary, local ou memory)"""
+    backend = config.get('MEDIA_STORAGE', 'cloudinary')
+    base_url = config.get('MEDIA_URL', '/media')
+
+    if backend == 'cloudinary':
+        return CloudinaryStorage(get_uploader, get_api)
+    if backend == 'local':
+        return LocalStorage(config.get('MEDIA_ROOT') or default_root, base_url)
+    if backend == 'memory':
+        return MemoryStorage(base_url)
+    raise ValueError(f"MEDIA_STORAGE inconnu : {backend}")
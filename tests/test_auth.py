@@ -0,0 +1,63 @@
+"""Liste de révocation des jetons JWT"""
+import time
+from datetime import timedelta
+
+from auth import TokenBlocklist, create_blocklist, shared_blocklist
+from cache import ExpiringStore, LocalRedis, SharedCache
+
+CONFIG = {'JWT_ACCESS_TOKEN_EXPIRES': timedelta(minutes=15), 'CACHE_BACKEND': 'memory', 'CACHE_MAX_ENTRIES': 1024}
+
+
+def access_token(jti, sub='1', gen=None, exp_in=900):
+    payload = {'jti': jti, 'sub': sub, 'type': 'access', 'iat': int(time.time()), 'exp': time.time() + exp_in}
+    if gen is not None:
+        payload['gen'] = gen
+    return payload
+
+
+def test_memory_blocklist_keeps_every_revocation():
+    blocklist = create_blocklist(CONFIG)
+    assert isinstance(blocklist.backend, ExpiringStore)
+    first = access_token('first')
+    blocklist.revoke_token(first)
+    for i in range(CONFIG['CACHE_MAX_ENTRIES'] + 100):
+        blocklist.revoke_token(access_token(f"other-{i}", sub=str(i)))
+        blocklist.revoke_user(i)
+    assert blocklist.is_revoked(first)
+
+
+def test_user_generation():
+    blocklist = TokenBlocklist(ExpiringStore(), user_ttl=900)
+    before = access_token('a', gen=blocklist.user_generation(1))
+    assert not blocklist.is_revoked(before)
+    blocklist.revoke_user(1)
+    # Émis juste après la révocation, dans la même seconde : valable
+    after = access_token('b', gen=blocklist.user_generation(1))
+    assert blocklist.is_revoked(before)
+    assert not blocklist.is_revoked(after)
+    assert not blocklist.is_revoked(access_token('c', sub='2'))
+
+
+def test_refresh_tokens_ignore_user_generation():
+    blocklist = TokenBlocklist(ExpiringStore(), user_ttl=900)
+    refresh = dict(access_token('r'), type='refresh')
+    blocklist.revoke_user(1)
+    assert not blocklist.is_revoked(refresh)
+    blocklist.revoke_token(refresh)
+    assert blocklist.is_revoked(refresh)
+
+
+def test_shared_blocklist_needs_a_real_redis_url():
+    assert not shared_blocklist(CONFIG)
+    assert not shared_blocklist(dict(CONFIG, CACHE_REDIS_URL='local://'))
+    assert shared_blocklist(dict(CONFIG, CACHE_REDIS_URL='redis://localhost:6379/0'))
+    assert isinstance(create_blocklist(dict(CONFIG, CACHE_REDIS_URL='local://')).backend, ExpiringStore)
+
+
+def test_generation_read_back_from_redis_client():
+    blocklist = TokenBlocklist(SharedCache(LocalRedis()), user_ttl=900)
+    blocklist.revoke_user(1)
+    generation = blocklist.user_generation(1)
+    assert isinstance(generation, str)
+    assert not blocklist.is_revoked(access_token('a', gen=generation))
+    assert blocklist.is_revoked(access_token('b'))
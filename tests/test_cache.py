@@ -0,0 +1,145 @@
+"""Caches : LRUCache, SharedCache sur LocalRedis (local://) et ExpiringStore"""
+import pytest
+
+import cache
+from cache import CatalogueCache, ExpiringStore, LocalRedis, LRUCache, NullCache, SharedCache, create_cache
+
+
+class Clock:
+    """Remplaçant de time.monotonic, avancé à la main"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture(params=['memory', 'local'])
+def backend(request):
+    if request.param == 'memory':
+        return LRUCache(max_entries=16, default_ttl=60)
+    return SharedCache(LocalRedis(), default_ttl=60)
+
+
+def text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def test_get_set_delete(backend):
+    assert backend.get('absent') is None
+    backend.set('key', 'value')
+    assert text(backend.get('key')) == 'value'
+    backend.delete('key')
+    assert backend.get('key') is None
+
+
+def test_default_ttl_expiry(backend, clock):
+    backend.set('key', 'value')
+    clock.now += 59
+    assert text(backend.get('key')) == 'value'
+    clock.now += 2
+    assert backend.get('key') is None
+
+
+def test_explicit_ttl(backend, clock):
+    backend.set('short', 'value', 5)
+    backend.set('forever', 'value', 0)
+    clock.now += 10
+    assert backend.get('short') is None
+    assert text(backend.get('forever')) == 'value'
+
+
+def test_clear(backend):
+    backend.set('a', '1')
+    backend.set('b', '2')
+    backend.clear()
+    assert backend.get('a') is None and backend.get('b') is None
+
+
+def test_lru_eviction_keeps_counters():
+    lru = LRUCache(max_entries=2, default_ttl=60)
+    lru.incr('version')
+    lru.set('a', '1')
+    lru.set('b', '2')
+    lru.get('a')
+    lru.set('c', '3')
+    assert lru.get('b') is None
+    assert lru.get('a') == '1' and lru.get('c') == '3'
+    assert lru.get('version') == 1
+
+
+def test_version_bump_invalidates(backend):
+    catalogue = CatalogueCache(backend)
+    builds = []
+
+    def build():
+        builds.append(True)
+        return f"body-{len(builds)}"
+
+    assert text(catalogue.get_or_build('list', build)) == 'body-1'
+    assert text(catalogue.get_or_build('list', build)) == 'body-1'
+    catalogue.bump()
+    assert text(catalogue.get_or_build('list', build)) == 'body-2'
+    assert catalogue.version() == 1
+    assert len(builds) == 2
+
+
+def test_create_cache_backends():
+    assert isinstance(create_cache({'CACHE_BACKEND': 'memory'}), LRUCache)
+    assert isinstance(create_cache({'CACHE_BACKEND': 'null'}), NullCache)
+    shared = create_cache({'CACHE_BACKEND': 'redis', 'CACHE_REDIS_URL': 'local://', 'CACHE_TTL': 30})
+    assert isinstance(shared, SharedCache) and isinstance(shared.client, LocalRedis)
+    assert shared.default_ttl == 30
+    assert isinstance(create_cache({'CACHE_BACKEND': 'redis'}).client, LocalRedis)
+    with pytest.raises(ValueError):
+        create_cache({'CACHE_BACKEND': 'memcached'})
+
+
+def test_shared_caches_see_the_same_client():
+    client = LocalRedis()
+    first, second = SharedCache(client), SharedCache(client)
+    CatalogueCache(first).bump()
+    assert CatalogueCache(second).version() == 1
+    first.set('key', 'value')
+    assert second.get('key') == b'value'
+
+
+def test_expiring_store_get_set_expiry(clock):
+    store = ExpiringStore(default_ttl=60)
+    store.set('key', 'value')
+    store.set('short', 'value', 5)
+    clock.now += 10
+    assert store.get('key') == 'value' and store.get('short') is None
+    store.delete('key')
+    assert store.get('key') is None
+    clock.now += 100
+    store.set('other', 'value')
+    store.clear()
+    assert store.get('other') is None
+
+
+def test_expiring_store_never_evicts_before_ttl(clock):
+    store = ExpiringStore(default_ttl=60)
+    for i in range(5000):
+        store.set(f"key:{i}", '1')
+    assert store.get('key:0') == '1'
+    assert len(store) == 5000
+
+
+def test_expiring_store_purges_expired_entries(clock):
+    store = ExpiringStore(default_ttl=60)
+    store.set('old', '1', 10)
+    store.set('renewed', '1', 10)
+    store.set('renewed', '2', 100)
+    clock.now += 20
+    store.set('new', '1')
+    assert len(store) == 2
+    assert store.get('old') is None and store.get('renewed') == '2'
@@ -0,0 +1,87 @@
+"""Envoi groupé des images (upload_batch) avec FakeUploader"""
+import threading
+
+from media import FakeUploader, PendingFile, upload_batch, upload_with_retry
+
+
+def pending(name):
+    return PendingFile(name, name.encode(), 'image/jpeg')
+
+
+def fake_upload(uploader):
+    """Fonction upload(data, filename) attendue par upload_batch"""
+    def upload(data, filename):
+        return uploader.upload(data, folder='tests', filename=filename)
+    return upload
+
+
+def test_transient_errors_are_retried_with_backoff():
+    uploader = FakeUploader(failures={'a.jpg': 2})
+    sleeps = []
+    [result] = upload_batch(fake_upload(uploader), [pending('a.jpg')], retries=2, backoff=0.5,
+                            sleep=sleeps.append)
+    assert result['success'] and result['attempts'] == 3
+    assert sleeps == [0.5, 1.0]
+    assert result['public_id'] in uploader.uploaded
+
+
+def test_gives_up_after_retries():
+    uploader = FakeUploader(failures={'a.jpg': 5})
+    sleeps = []
+    [result] = upload_batch(fake_upload(uploader), [pending('a.jpg')], retries=2, sleep=sleeps.append)
+    assert not result['success'] and result['attempts'] == 3
+    assert 'a.jpg' in result['error']
+    assert len(sleeps) == 2
+    assert not uploader.uploaded
+
+
+def test_value_error_is_not_retried():
+    calls = []
+
+    def upload(data, filename):
+        calls.append(filename)
+        raise ValueError("Image illisible")
+
+    sleeps = []
+    result = upload_with_retry(upload, pending('broken.jpg'), retries=3, sleep=sleeps.append)
+    assert result == {'filename': 'broken.jpg', 'success': False, 'error': 'Image illisible', 'attempts': 1}
+    assert calls == ['broken.jpg'] and sleeps == []
+
+
+def test_per_file_results_under_concurrency_limit():
+    names = [f"photo-{i}.jpg" for i in range(8)]
+    uploader = FakeUploader(latency=0.02, failures={'photo-2.jpg': 1, 'photo-5.jpg': 10})
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def upload(data, filename):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        try:
+            return fake_upload(uploader)(data, filename)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    results = upload_batch(upload, [pending(name) for name in names], max_concurrency=3, retries=1,
+                           sleep=lambda seconds: None)
+    assert [result['filename'] for result in results] == names
+    assert 1 < peak[0] <= 3
+    failed = {result['filename'] for result in results if not result['success']}
+    assert failed == {'photo-5.jpg'}
+    assert next(r for r in results if r['filename'] == 'photo-2.jpg')['attempts'] == 2
+    assert len(uploader.uploaded) == len(names) - 1
+
+
+def test_single_worker_runs_sequentially():
+    uploader = FakeUploader()
+    threads = set()
+
+    def upload(data, filename):
+        threads.add(threading.get_ident())
+        return fake_upload(uploader)(data, filename)
+
+    results = upload_batch(upload, [pending('a.jpg'), pending('b.jpg')], max_concurrency=1)
+    assert [result['success'] for result in results] == [True, True]
+    assert threads == {threading.get_ident()}